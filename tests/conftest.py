@@ -37,3 +37,28 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+import shutil
+import tempfile
+
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш страниц и счётчиков живёт дольше тестовой транзакции: без
+    # очистки следующий тест получит страницы, отрисованные для прошлого.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings):
+    # Картинки постов и миниатюры - во временный каталог, не в yatube/media.
+    media_root = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = media_root
+    yield
+    shutil.rmtree(media_root, ignore_errors=True)
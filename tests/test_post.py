@@ -69,8 +69,8 @@ class TestPostEditView:
         assert 'form' in response.context, (
             'Проверьте, что передали форму `form` в контекст страницы `/posts/<post_id>/edit/`'
         )
-        assert len(response.context['form'].fields) == 2, (
-            'Проверьте, что в форме `form` на страницу `/posts/<post_id>/edit/` 2 поля'
+        assert len(response.context['form'].fields) == 3, (
+            'Проверьте, что в форме `form` на страницу `/posts/<post_id>/edit/` 3 поля'
         )
         assert 'group' in response.context['form'].fields, (
             'Проверьте, что в форме `form` на странице `/posts/<post_id>/edit/` есть поле `group`'
@@ -81,6 +81,12 @@ class TestPostEditView:
         assert not response.context['form'].fields['group'].required, (
             'Проверьте, что в форме `form` на странице `/posts/<post_id>/edit/` поле `group` не обязательно'
         )
+        assert 'image' in response.context['form'].fields, (
+            'Проверьте, что в форме `form` на странице `/posts/<post_id>/edit/` есть поле `image`'
+        )
+        assert type(response.context['form'].fields['image']) == forms.fields.ImageField, (
+            'Проверьте, что в форме `form` на странице `/posts/<post_id>/edit/` поле `image` типа `ImageField`'
+        )
 
         assert 'text' in response.context['form'].fields, (
             'Проверьте, что в форме `form` на странице `/posts/<post_id>/edit/` есть поле `text`'
@@ -0,0 +1,155 @@
+"""Нагрузочный тест лент: как растёт пропускная способность с числом
+одновременных клиентов при развёртывании через WSGI и через ASGI.
+
+Оба варианта получают одинаковый пул из threads потоков - как у
+многопоточного WSGI-сервера и как settings.ASGI_THREADS у yatube.asgi.
+Клиенты - корутины, которые дочитывают каждый ответ client_delay
+секунд (медленная сеть). WSGI-поток занят, пока клиент не дочитает
+ответ; ASGI-поток свободен сразу после представления, а отдача идёт
+в цикле событий. Запросы идут прямо в приложения, без сокетов.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ASGIBridge, build_environ
+
+from .harness import default_scenarios, percentile
+
+FEED_SCENARIOS = ('index', 'group_list', 'profile', 'post_detail')
+DEFAULT_LEVELS = (1, 8, 32, 128)
+
+
+@dataclass
+class Scaling:
+    deployment: str
+    concurrency: int
+    requests: int
+    throughput: float
+    p95: float
+    errors: int
+
+
+def feed_urls():
+    return [
+        url for name, url in default_scenarios() if name in FEED_SCENARIOS
+    ]
+
+
+def http_scope(url):
+    path, _, query = url.partition('?')
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def serve_wsgi(application, url, client_delay):
+    """Запрос к WSGI-приложению; поток ждёт, пока клиент дочитает."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    response = application(build_environ(http_scope(url), b''),
+                           start_response)
+    try:
+        for _ in response:
+            pass
+        time.sleep(client_delay)
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return statuses[0]
+
+
+async def serve_asgi(bridge, url, client_delay):
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif not message.get('more_body', False):
+            await asyncio.sleep(client_delay)
+
+    await bridge(http_scope(url), receive, send)
+    return statuses[0]
+
+
+async def drive(request, urls, concurrency, total):
+    """concurrency клиентов делят total запросов; (время, задержки, ошибки)."""
+    numbers = iter(range(total))
+    timings = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for number in numbers:
+            start = time.perf_counter()
+            status = await request(urls[number % len(urls)])
+            timings.append(time.perf_counter() - start)
+            errors += status >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(timings), errors
+
+
+def scaling(deployment, request, urls, concurrency, rounds):
+    total = concurrency * rounds
+    elapsed, timings, errors = asyncio.run(
+        drive(request, urls, concurrency, total)
+    )
+    return Scaling(
+        deployment=deployment,
+        concurrency=concurrency,
+        requests=total,
+        throughput=total / elapsed,
+        p95=percentile(timings, 0.95),
+        errors=errors,
+    )
+
+
+def compare(levels=DEFAULT_LEVELS, threads=8, client_delay=0.05, rounds=5):
+    """Scaling для WSGI и ASGI на каждом уровне конкурентности."""
+    urls = feed_urls()
+    if not urls:
+        return []
+    application = get_wsgi_application()
+    bridge = ASGIBridge(application, threads)
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    def wsgi_request(url):
+        return asyncio.get_running_loop().run_in_executor(
+            pool, serve_wsgi, application, url, client_delay
+        )
+
+    def asgi_request(url):
+        return serve_asgi(bridge, url, client_delay)
+
+    try:
+        return [
+            scaling(deployment, request, urls, concurrency, rounds)
+            for concurrency in levels
+            for deployment, request in (
+                ('wsgi', wsgi_request), ('asgi', asgi_request),
+            )
+        ]
+    finally:
+        pool.shutdown()
+        bridge.executor.shutdown()
@@ -0,0 +1,114 @@
+"""Детерминированный генератор данных для нагрузочных замеров.
+
+Один и тот же seed даёт одних и тех же авторов, группы и посты, поэтому
+замеры на разных машинах и коммитах сравнимы. Авторы и группы выбираются
+со смещением к первым: несколько «тяжёлых» лент и длинный хвост, как на
+живом сайте.
+"""
+import random
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts import search
+from posts.importing import manual_pub_date
+from posts.models import AuthorStats, Group, Post, User
+
+BATCH_SIZE = 5000
+# Чем больше, тем сильнее посты стягиваются к первым авторам/группам.
+SKEW = 3
+GROUP_SHARE = 0.8
+HISTORY_DAYS = 2 * 365
+USERNAME_PREFIX = 'bench'
+
+
+def skewed(rng, items):
+    return items[int(len(items) * rng.random() ** SKEW)]
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_users(fake, count, batch_size):
+    users = (
+        User(
+            username=f'{USERNAME_PREFIX}{number}_{fake.user_name()}'[:150],
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password='!',
+        )
+        for number in range(count)
+    )
+    for batch in batches(users, batch_size):
+        User.objects.bulk_create(batch)
+    return list(User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).order_by('id').values_list('id', flat=True))
+
+
+def create_groups(fake, count):
+    Group.objects.bulk_create(
+        Group(
+            title=fake.catch_phrase()[:200],
+            slug=f'{USERNAME_PREFIX}-{number}',
+            description=fake.paragraph(),
+        )
+        for number in range(count)
+    )
+    return list(Group.objects.filter(
+        slug__startswith=f'{USERNAME_PREFIX}-'
+    ).order_by('id').values_list('id', flat=True))
+
+
+def generate(authors, posts, groups, seed=0, batch_size=BATCH_SIZE,
+             progress=None):
+    """Создаёт авторов, группы и посты, затем пересобирает производные
+    данные (AuthorStats, поисковый индекс) и чистит кэш.
+
+    progress(создано_постов) вызывается после каждой пачки.
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    author_ids = create_users(fake, authors, batch_size)
+    group_ids = create_groups(fake, groups)
+    now = timezone.now()
+    created = 0
+
+    def make_post():
+        return Post(
+            author_id=skewed(rng, author_ids),
+            group_id=(
+                skewed(rng, group_ids)
+                if group_ids and rng.random() < GROUP_SHARE else None
+            ),
+            text=fake.paragraph(nb_sentences=rng.randint(1, 6)),
+            pub_date=now - timedelta(
+                seconds=rng.randint(0, HISTORY_DAYS * 24 * 60 * 60)
+            ),
+        )
+
+    with manual_pub_date():
+        for batch in batches((make_post() for _ in range(posts)),
+                             batch_size):
+            with transaction.atomic():
+                Post.objects.bulk_create(batch)
+            created += len(batch)
+            if progress is not None:
+                progress(created)
+    # bulk_create идёт мимо сигналов posts.signals.
+    AuthorStats.rebuild()
+    search.rebuild_index()
+    cache.clear()
+    return author_ids, group_ids
@@ -0,0 +1,177 @@
+"""Замеры задержки, числа SQL-запросов и пропускной способности по URL.
+
+Запросы идут либо через django.test.Client, либо прямо в WSGI-приложение
+(без сессий, middleware клиента и разбора ответа в тестовом стиле) -
+второй вариант ближе к тому, что видит балансировщик.
+"""
+import json
+import math
+import time
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cons import NUMBER_OF_POSTS
+from posts.models import AuthorStats, Group, Post
+
+# На какую долю p95 может вырасти относительно базовой линии.
+DEFAULT_TOLERANCE = 0.2
+
+
+@dataclass
+class Result:
+    name: str
+    url: str
+    requests: int
+    p50: float
+    p95: float
+    p99: float
+    queries: float
+    throughput: float
+
+    def regressions(self, baseline, tolerance=DEFAULT_TOLERANCE):
+        """Список описаний регрессий относительно baseline (Result)."""
+        problems = []
+        if self.p95 > baseline.p95 * (1 + tolerance):
+            problems.append(
+                f'{self.name}: p95 {self.p95 * 1000:.1f} мс, '
+                f'было {baseline.p95 * 1000:.1f} мс'
+            )
+        if self.queries > baseline.queries:
+            problems.append(
+                f'{self.name}: {self.queries:g} запросов, '
+                f'было {baseline.queries:g}'
+            )
+        return problems
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга по отсортированным values."""
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+def default_scenarios():
+    """(имя, url) для каждой страницы постов на самых тяжёлых лентах."""
+    newest = Post.objects.order_by('-pub_date', '-id').first()
+    if newest is None:
+        return []
+    stats = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count'
+    ).first()
+    group = Group.objects.annotate(
+        posts_count=Count('groups')
+    ).filter(posts_count__gt=0).order_by('-posts_count').first()
+    last_page = Paginator(range(Post.objects.count()), NUMBER_OF_POSTS)
+    scenarios = [
+        ('index', reverse('posts:index')),
+        ('index_last_page',
+         f"{reverse('posts:index')}?page={last_page.num_pages}"),
+        ('post_detail',
+         reverse('posts:post_detail', kwargs={'post_id': newest.pk})),
+        ('search', f"{reverse('posts:search')}?"
+                   f"{urlencode({'q': newest.text.split()[0]})}"),
+    ]
+    if stats is not None:
+        scenarios.append(('profile', reverse(
+            'posts:profile', kwargs={'username': stats.author.username}
+        )))
+    if group is not None:
+        scenarios.append(('group_list', reverse(
+            'posts:group_list', kwargs={'slug': group.slug}
+        )))
+    return scenarios
+
+
+class WSGIClient:
+    """Вызывает WSGI-приложение напрямую, как это делает сервер."""
+
+    def __init__(self):
+        self.application = get_wsgi_application()
+
+    def get(self, url):
+        path, _, query = url.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(status_line)
+
+        body = self.application(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return status[0]
+
+
+def measure(name, url, requests, client, warmup=1, cold=False):
+    """Прогоняет url requests раз и возвращает Result.
+
+    cold=True чистит кэш перед каждым запросом (вне замера): так видно
+    цену страницы без кэша страниц, размеров лент и фрагментов.
+    """
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    queries = 0
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - start)
+        queries += len(captured)
+    timings.sort()
+    return Result(
+        name=name,
+        url=url,
+        requests=requests,
+        p50=percentile(timings, 0.5),
+        p95=percentile(timings, 0.95),
+        p99=percentile(timings, 0.99),
+        queries=queries / requests,
+        throughput=requests / sum(timings),
+    )
+
+
+def run(scenarios, requests, wsgi=False, warmup=1, cold=False):
+    client = WSGIClient() if wsgi else Client()
+    return [
+        measure(name, url, requests, client, warmup=warmup, cold=cold)
+        for name, url in scenarios
+    ]
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return {
+            item['name']: Result(**item) for item in json.load(file)
+        }
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            [asdict(result) for result in results], file,
+            ensure_ascii=False, indent=2,
+        )
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.concurrency import DEFAULT_LEVELS, compare
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест лент: пропускная способность и p95 при '
+            'росте числа клиентов для WSGI и для ASGI (yatube.asgi).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--levels', type=int, nargs='+', default=list(DEFAULT_LEVELS),
+            help='Числа одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS,
+            help='Потоков у обоих развёртываний.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд клиент дочитывает каждый ответ.',
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=5,
+            help='Запросов на клиента на каждом уровне.',
+        )
+
+    def handle(self, *args, **options):
+        results = compare(
+            levels=options['levels'], threads=options['threads'],
+            client_delay=options['client_delay'], rounds=options['rounds'],
+        )
+        if not results:
+            raise CommandError('Нет постов: сначала manage.py bench_seed')
+        self.stdout.write(
+            f'{"сервер":<8}{"клиентов":>10}{"запросов":>10}'
+            f'{"запр/с":>10}{"p95, мс":>10}{"ошибок":>8}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.deployment:<8}{result.concurrency:>10}'
+                f'{result.requests:>10}{result.throughput:>10.1f}'
+                f'{result.p95 * 1000:>10.1f}{result.errors:>8}'
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.pagination import FEED_SIZES, compare
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга и размер навигации пагинатора '
+            'со всеми номерами страниц и с сокращённым диапазоном.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=FEED_SIZES,
+            help='Размеры ленты в постах.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"постов":>10}{"режим":>8}{"мс":>10}{"байт":>12}'
+        )
+        for cost in compare(options['sizes'], options['repeat']):
+            self.stdout.write(
+                f'{cost.posts:>10}{cost.mode:>8}'
+                f'{cost.milliseconds:>10.2f}{cost.size:>12}'
+            )
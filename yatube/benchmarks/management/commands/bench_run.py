@@ -0,0 +1,82 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.harness import (DEFAULT_TOLERANCE, default_scenarios,
+                                load_baseline, run, save_baseline)
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'baselines.json',
+)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95/p99, запросы к БД и пропускную способность '
+            'страниц постов и сравнивает с базовой линией.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--wsgi', action='store_true',
+            help='Вызывать WSGI-приложение напрямую вместо test Client.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Чистить кэш перед каждым запросом.',
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новую базовую линию.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+            help='Допустимый рост p95, доля (0.2 = 20%%).',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = default_scenarios()
+        if not scenarios:
+            raise CommandError('Постов нет: сначала manage.py bench_seed')
+        results = run(
+            scenarios, options['requests'], wsgi=options['wsgi'],
+            warmup=options['warmup'], cold=options['cold'],
+        )
+        self.stdout.write(
+            f'{"страница":<18}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"p99, мс":>10}{"запросов":>10}{"rps":>10}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.name:<18}{result.p50 * 1000:>10.1f}'
+                f'{result.p95 * 1000:>10.1f}{result.p99 * 1000:>10.1f}'
+                f'{result.queries:>10g}{result.throughput:>10.1f}'
+            )
+        path = options['baseline']
+        if options['save_baseline']:
+            save_baseline(path, results)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовая линия записана в {path}'
+            ))
+            return
+        if not os.path.exists(path):
+            # Без базовой линии сравнивать не с чем - это не «регрессий нет».
+            raise CommandError(
+                f'Нет базовой линии {path}: запишите её на эталонной '
+                f'машине через --save-baseline'
+            )
+        baseline = load_baseline(path)
+        if not any(result.name in baseline for result in results):
+            raise CommandError(f'В {path} нет ни одной из замеренных страниц')
+        problems = [
+            problem
+            for result in results if result.name in baseline
+            for problem in result.regressions(
+                baseline[result.name], options['tolerance']
+            )
+        ]
+        if problems:
+            raise CommandError('Регрессии:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
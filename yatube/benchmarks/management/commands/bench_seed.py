@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.data import BATCH_SIZE, generate
+
+
+class Command(BaseCommand):
+    help = ('Заполняет БД воспроизводимыми тестовыми данными для замеров. '
+            'Запускать на пустой базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=1_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = options['posts']
+
+        def progress(created):
+            self.stdout.write(f'\rПостов: {created}/{total}', ending='')
+            self.stdout.flush()
+
+        generate(
+            options['authors'], total, options['groups'],
+            seed=options['seed'], batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('Данные для замеров созданы'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.sessions import compare
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время и запросы лент для авторизованного '
+            'пользователя с сессиями в базе и с кэшированными '
+            'сессиями и пользователем.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=2)
+
+    def handle(self, *args, **options):
+        results = compare(
+            requests=options['requests'], warmup=options['warmup']
+        )
+        if not results:
+            raise CommandError('Постов нет: сначала manage.py bench_seed')
+        self.stdout.write(
+            f'{"профиль":<10}{"страница":<14}{"p50, мс":>10}'
+            f'{"p95, мс":>10}{"запросов":>10}'
+        )
+        for profile, result in results:
+            self.stdout.write(
+                f'{profile:<10}{result.name:<14}{result.p50 * 1000:>10.2f}'
+                f'{result.p95 * 1000:>10.2f}{result.queries:>10g}'
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.sqlite import compare
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность конкурентного чтения ленты '
+            'из SQLite с PRAGMA по умолчанию и с продакшен-профилем.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument(
+            '--write-interval', type=float, default=0.01,
+            help='Пауза писателя между вставками, секунд.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер только для SQLite')
+        results = compare(
+            readers=options['readers'], duration=options['duration'],
+            write_interval=options['write_interval'],
+        )
+        self.stdout.write(
+            f'{"профиль":<12}{"чтений/с":>12}{"записей/с":>12}'
+            f'{"busy":>8}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.profile:<12}{result.reads_per_second:>12.1f}'
+                f'{result.writes_per_second:>12.1f}{result.busy_errors:>8}'
+            )
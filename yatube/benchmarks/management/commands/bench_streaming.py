@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.streaming import compare
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время до первого байта, полное время и пиковую '
+            'память лент при render() и при потоковой отдаче.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+
+    def handle(self, *args, **options):
+        results = compare(
+            requests=options['requests'], warmup=options['warmup']
+        )
+        if not results:
+            raise CommandError('Постов нет: сначала manage.py bench_seed')
+        self.stdout.write(
+            f'{"режим":<13}{"страница":<12}{"TTFB, мс":>10}'
+            f'{"всего, мс":>11}{"память, КБ":>12}{"байт":>9}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.mode:<13}{result.name:<12}'
+                f'{result.ttfb * 1000:>10.2f}{result.total * 1000:>11.2f}'
+                f'{result.peak_memory / 1024:>12.1f}{result.size:>9}'
+            )
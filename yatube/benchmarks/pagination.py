@@ -0,0 +1,59 @@
+"""Цена навигации пагинатора в зависимости от размера ленты.
+
+Рендерит posts/includes/paginator.html для середины ленты дважды: со
+всеми номерами страниц (как было) и с elided_page_range. Посты в БД не
+нужны - пагинатору хватает range нужной длины.
+"""
+import time
+from dataclasses import dataclass
+
+from django.core.paginator import Paginator
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from posts.cons import NUMBER_OF_POSTS
+from posts.paginators import elided_page_range
+
+FEED_SIZES = (1_000, 10_000, 50_000, 1_000_000)
+TEMPLATE = 'posts/includes/paginator.html'
+
+
+@dataclass
+class PaginatorCost:
+    posts: int
+    mode: str
+    milliseconds: float
+    size: int
+
+
+def render_cost(posts, elided, repeat):
+    paginator = Paginator(range(posts), NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(paginator.num_pages // 2)
+    page_range = (
+        list(elided_page_range(page_obj.number, paginator.num_pages))
+        if elided else paginator.page_range
+    )
+    context = {
+        'request': RequestFactory().get('/', {'page': page_obj.number}),
+        'page_obj': page_obj,
+        'page_range': page_range,
+    }
+    template = get_template(TEMPLATE)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        html = template.render(context)
+    elapsed = (time.perf_counter() - start) / repeat
+    return PaginatorCost(
+        posts=posts,
+        mode='elided' if elided else 'full',
+        milliseconds=elapsed * 1000,
+        size=len(html.encode()),
+    )
+
+
+def compare(sizes=FEED_SIZES, repeat=3):
+    return [
+        render_cost(posts, elided, repeat)
+        for posts in sizes
+        for elided in (False, True)
+    ]
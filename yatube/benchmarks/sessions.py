@@ -0,0 +1,49 @@
+"""Цена сессии и пользователя на каждый запрос авторизованного читателя.
+
+Одни и те же ленты открывает залогиненный клиент в двух профилях:
+сессии в базе и ModelBackend (как было) и core.sessions с
+core.auth.CachedModelBackend. Разница в запросах и времени - то, что
+SessionMiddleware и AuthenticationMiddleware стоят каждому запросу.
+"""
+from django.test import Client
+from django.test.utils import override_settings
+
+from posts.models import User
+
+from .concurrency import FEED_SCENARIOS
+from .harness import default_scenarios, measure
+
+PROFILES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend',
+        ],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'core.sessions',
+        'AUTHENTICATION_BACKENDS': ['core.auth.CachedModelBackend'],
+    },
+}
+
+
+def compare(requests=50, warmup=2):
+    """[(профиль, Result)] по каждой ленте для каждого профиля."""
+    user = User.objects.order_by('pk').first()
+    scenarios = [
+        (name, url) for name, url in default_scenarios()
+        if name in FEED_SCENARIOS
+    ]
+    if user is None or not scenarios:
+        return []
+    results = []
+    for profile, overrides in PROFILES.items():
+        with override_settings(**overrides):
+            client = Client()
+            client.force_login(user)
+            for name, url in scenarios:
+                results.append((profile, measure(
+                    name, url, requests, client, warmup=warmup
+                )))
+            client.logout()
+    return results
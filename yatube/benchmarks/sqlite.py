@@ -0,0 +1,161 @@
+"""Конкурентное чтение ленты из SQLite при одновременной записи.
+
+Снимок базы default копируется во временный файл; на нём несколько
+потоков с собственными соединениями крутят запрос главной страницы,
+а один поток вставляет посты. Один прогон - с PRAGMA по умолчанию
+(журнал DELETE), другой - с settings.SQLITE_PRODUCTION_PRAGMAS.
+Модуль sqlite3 отпускает GIL на время запроса, так что потоки
+действительно конкурируют за файл базы.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX
+from django.utils import timezone
+
+from posts.cons import NUMBER_OF_POSTS
+from posts.models import Post, User
+
+# Как ведёт себя SQLite без настроек: журнал отката, полная синхронизация.
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+# Таймаут ожидания блокировки у модуля sqlite3 по умолчанию, секунд.
+DEFAULT_TIMEOUT = 5.0
+
+
+@dataclass
+class Throughput:
+    profile: str
+    reads_per_second: float
+    writes_per_second: float
+    busy_errors: int
+
+
+def feed_query():
+    queryset = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-id'
+    )[:NUMBER_OF_POSTS]
+    sql, params = queryset.query.sql_with_params()
+    # Плейсхолдеры Django (%s) -> плейсхолдеры модуля sqlite3 (?).
+    return FORMAT_QMARK_REGEX.sub('?', sql).replace('%%', '%'), params
+
+
+def snapshot(path):
+    """Копия базы default в path через sqlite3 backup (даже :memory:).
+
+    Вызывать вне транзакции: backup() ждёт её окончания.
+    """
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+def connect(path, pragmas):
+    conn = sqlite3.connect(
+        path, timeout=DEFAULT_TIMEOUT, check_same_thread=False,
+        isolation_level=None,
+    )
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+class Workload:
+    """Потоки читателей и писателя над одним файлом базы."""
+
+    def __init__(self, path, pragmas, sql, params, author_id):
+        self.path = path
+        self.pragmas = pragmas
+        self.sql = sql
+        self.params = params
+        self.author_id = author_id
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.busy = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def read(self):
+        conn = connect(self.path, self.pragmas)
+        while not self.stop.is_set():
+            try:
+                conn.execute(self.sql, self.params).fetchall()
+                self.count('reads')
+            except sqlite3.OperationalError:
+                self.count('busy')
+        conn.close()
+
+    def write(self, interval):
+        conn = connect(self.path, self.pragmas)
+        while not self.stop.is_set():
+            now = timezone.now().isoformat(' ')
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT INTO posts_post (text, pub_date, updated, '
+                    'author_id, image, thumbnails) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    ('Пост под нагрузкой', now, now, self.author_id, '', ''),
+                )
+                conn.execute('COMMIT')
+                self.count('writes')
+            except sqlite3.OperationalError:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                self.count('busy')
+            time.sleep(interval)
+        conn.close()
+
+
+def measure(path, profile, pragmas, readers, duration, write_interval):
+    sql, params = feed_query()
+    author_id = User.objects.values_list('pk', flat=True).first()
+    # journal_mode хранится в файле: выставляем до старта потоков.
+    connect(path, pragmas).close()
+    workload = Workload(path, pragmas, sql, params, author_id)
+    threads = [
+        threading.Thread(target=workload.read) for _ in range(readers)
+    ]
+    if author_id is not None:
+        threads.append(
+            threading.Thread(target=workload.write, args=(write_interval,))
+        )
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    workload.stop.set()
+    for thread in threads:
+        thread.join()
+    return Throughput(
+        profile=profile,
+        reads_per_second=workload.reads / duration,
+        writes_per_second=workload.writes / duration,
+        busy_errors=workload.busy,
+    )
+
+
+def compare(readers=8, duration=5.0, write_interval=0.01):
+    """Throughput для PRAGMA по умолчанию и для продакшен-профиля."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        snapshot(path)
+        return [
+            measure(path, profile, pragmas, readers, duration,
+                    write_interval)
+            for profile, pragmas in (
+                ('default', DEFAULT_PRAGMAS),
+                ('production', settings.SQLITE_PRODUCTION_PRAGMAS),
+            )
+        ]
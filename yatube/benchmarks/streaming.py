@@ -0,0 +1,133 @@
+"""Время до первого байта и пиковая память лент: render() против
+потоковой отдачи posts.streaming.
+
+Запросы идут прямо в WSGI-приложение от авторизованного читателя - его
+страницы не берутся из кэша страниц, каждая рендерится заново. TTFB -
+время до первого непустого куска тела ответа, полное время - до
+последнего. Память считается tracemalloc в отдельном проходе, чтобы
+трассировка не искажала время.
+"""
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.asgi import build_environ
+from posts.models import User
+
+from .concurrency import FEED_SCENARIOS, http_scope
+from .harness import default_scenarios, percentile
+
+MODES = {
+    'render': {'POSTS_STREAMING_FEEDS': False},
+    'stream': {'POSTS_STREAMING_FEEDS': True},
+    'stream_gzip': {
+        'POSTS_STREAMING_FEEDS': True, 'POSTS_STREAMING_GZIP': True,
+    },
+}
+# post_detail не потоковая - в сравнении только ленты.
+STREAMED_SCENARIOS = tuple(
+    name for name in FEED_SCENARIOS if name != 'post_detail'
+)
+
+
+@dataclass
+class Streaming:
+    name: str
+    mode: str
+    requests: int
+    ttfb: float
+    total: float
+    peak_memory: int
+    size: int
+
+
+def serve(application, url, cookie):
+    """(TTFB, полное время, байт тела) одного запроса."""
+    scope = http_scope(url)
+    scope['headers'] = scope['headers'] + [
+        (b'cookie', cookie.encode()),
+        (b'accept-encoding', b'gzip'),
+    ]
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    start = time.perf_counter()
+    first = None
+    size = 0
+    response = application(build_environ(scope, b''), start_response)
+    try:
+        for chunk in response:
+            if chunk and first is None:
+                first = time.perf_counter() - start
+            size += len(chunk)
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    total = time.perf_counter() - start
+    return first or total, total, size
+
+
+def peak_memory(application, url, cookie):
+    tracemalloc.start()
+    try:
+        serve(application, url, cookie)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(application, name, mode, url, cookie, requests, warmup):
+    for _ in range(warmup):
+        serve(application, url, cookie)
+    ttfbs, totals = [], []
+    for _ in range(requests):
+        ttfb, total, size = serve(application, url, cookie)
+        ttfbs.append(ttfb)
+        totals.append(total)
+    ttfbs.sort()
+    totals.sort()
+    return Streaming(
+        name=name,
+        mode=mode,
+        requests=requests,
+        ttfb=percentile(ttfbs, 0.5),
+        total=percentile(totals, 0.5),
+        peak_memory=peak_memory(application, url, cookie),
+        size=size,
+    )
+
+
+def compare(requests=20, warmup=2):
+    """[Streaming] по каждой ленте для каждого режима из MODES."""
+    user = User.objects.order_by('pk').first()
+    scenarios = [
+        (name, url) for name, url in default_scenarios()
+        if name in STREAMED_SCENARIOS
+    ]
+    if user is None or not scenarios:
+        return []
+    client = Client()
+    client.force_login(user)
+    cookie = (
+        f'{settings.SESSION_COOKIE_NAME}='
+        f'{client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    )
+    application = get_wsgi_application()
+    results = []
+    try:
+        for mode, overrides in MODES.items():
+            with override_settings(**overrides):
+                for name, url in scenarios:
+                    results.append(measure(
+                        application, name, mode, url, cookie, requests,
+                        warmup,
+                    ))
+    finally:
+        client.logout()
+    return results
@@ -0,0 +1,169 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from benchmarks.data import generate
+from benchmarks.harness import (Result, default_scenarios, percentile, run,
+                                save_baseline)
+from benchmarks.pagination import compare as compare_paginators
+from benchmarks.sessions import compare as compare_sessions
+from benchmarks.sqlite import compare
+from benchmarks.streaming import MODES
+from benchmarks.streaming import compare as compare_streaming
+from posts.models import AuthorStats, Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generate(authors=5, posts=40, groups=3, seed=1, batch_size=15)
+
+    def test_generate_is_deterministic(self):
+        """Один seed - одни и те же данные, производные пересобраны."""
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            40
+        )
+        texts = list(Post.objects.order_by('id').values_list('text'))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        generate(authors=5, posts=40, groups=3, seed=1)
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list('text')), texts
+        )
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_run_covers_post_pages(self):
+        """Прогон даёт результат по каждой странице в обоих режимах."""
+        scenarios = default_scenarios()
+        self.assertEqual(
+            {name for name, _ in scenarios},
+            {'index', 'index_last_page', 'post_detail', 'search', 'profile',
+             'group_list'}
+        )
+        for wsgi in (False, True):
+            with self.subTest(wsgi=wsgi):
+                results = run(scenarios, requests=3, wsgi=wsgi, cold=True)
+                for result in results:
+                    self.assertGreater(result.queries, 0)
+                    self.assertLessEqual(result.p50, result.p99)
+
+    def test_cached_sessions_save_queries(self):
+        """С кэшированными сессией и пользователем запросов меньше."""
+        results = {
+            (profile, result.name): result
+            for profile, result in compare_sessions(requests=2, warmup=1)
+        }
+        for (profile, name), result in results.items():
+            if profile == 'cached':
+                with self.subTest(page=name):
+                    self.assertEqual(
+                        result.queries, results['db', name].queries - 2
+                    )
+
+    def test_streaming_compared_with_render(self):
+        results = {
+            (result.mode, result.name): result
+            for result in compare_streaming(requests=2, warmup=1)
+        }
+        names = {name for _, name in results}
+        self.assertEqual(len(results), len(MODES) * len(names))
+        for (mode, name), result in results.items():
+            with self.subTest(mode=mode, page=name):
+                self.assertLessEqual(result.ttfb, result.total)
+                self.assertGreater(result.peak_memory, 0)
+                if mode == 'stream_gzip':
+                    self.assertLess(
+                        result.size, results['stream', name].size
+                    )
+
+    def test_regressions_flagged(self):
+        """Рост p95 сверх допуска и лишние запросы - регрессии."""
+        baseline = Result('index', '/', 10, 0.01, 0.02, 0.03, 2, 100)
+        faster = Result('index', '/', 10, 0.01, 0.021, 0.03, 2, 100)
+        slower = Result('index', '/', 10, 0.01, 0.05, 0.06, 3, 50)
+        self.assertEqual(faster.regressions(baseline), [])
+        self.assertEqual(len(slower.regressions(baseline)), 2)
+
+    def test_command_fails_on_regression(self):
+        """bench_run падает, если страница медленнее базовой линии."""
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        save_baseline(path, [Result('index', '/', 1, 0, 0, 0, 0, 0)])
+        with self.assertRaises(CommandError):
+            call_command(
+                'bench_run', requests=2, warmup=0, baseline=path,
+                stdout=StringIO(),
+            )
+        call_command(
+            'bench_run', requests=2, warmup=0, baseline=path,
+            save_baseline=True, stdout=StringIO(),
+        )
+        call_command(
+            'bench_run', requests=2, warmup=0, baseline=path,
+            tolerance=1000, stdout=StringIO(),
+        )
+
+    def test_command_fails_without_baseline(self):
+        """Без файла базовой линии bench_run не сообщает «регрессий нет»."""
+        path = os.path.join(tempfile.mkdtemp(), 'missing.json')
+        self.addCleanup(os.rmdir, os.path.dirname(path))
+        with self.assertRaisesMessage(CommandError, '--save-baseline'):
+            call_command(
+                'bench_run', requests=2, warmup=0, baseline=path,
+                stdout=StringIO(),
+            )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'замер SQLite')
+class SQLiteThroughputTests(TransactionTestCase):
+    # backup() ждёт, пока у базы есть открытая транзакция, поэтому
+    # без обёртки TestCase.
+
+    def setUp(self):
+        generate(authors=2, posts=20, groups=1, seed=1)
+
+    def test_compare_profiles(self):
+        """Оба профиля читают ленту, пока писатель вставляет посты."""
+        results = compare(readers=2, duration=0.2, write_interval=0.01)
+        self.assertEqual(
+            [result.profile for result in results], ['default', 'production']
+        )
+        for result in results:
+            with self.subTest(profile=result.profile):
+                self.assertGreater(result.reads_per_second, 0)
+                self.assertGreater(result.writes_per_second, 0)
+
+
+class PaginatorBenchmarkTests(SimpleTestCase):
+    def test_elided_navigation_does_not_grow_with_feed(self):
+        """Размер сокращённой навигации не зависит от длины ленты."""
+        costs = {
+            (cost.posts, cost.mode): cost
+            for cost in compare_paginators(sizes=(1000, 20000), repeat=1)
+        }
+        self.assertLess(
+            costs[20000, 'elided'].size, costs[1000, 'full'].size
+        )
+        self.assertLess(
+            abs(costs[20000, 'elided'].size - costs[1000, 'elided'].size), 50
+        )
+        self.assertGreater(
+            costs[20000, 'full'].size, 10 * costs[1000, 'full'].size
+        )
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'payload', 'run_after', 'attempts')
+    list_filter = ('name',)
+    readonly_fields = ('created', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
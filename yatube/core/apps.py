@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Обработчики core.tasks из модулей tasks всех приложений.
+        autodiscover_modules('tasks')
+        if settings.CORE_TEMPLATE_PROFILING:
+            from . import profiling
+            profiling.install()
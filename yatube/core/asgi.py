@@ -0,0 +1,195 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+В Django 2.2 нет ни ASGI-обработчика, ни async-представлений, а ORM
+синхронный. Поэтому представление по-прежнему выполняется в потоке -
+но из пула фиксированного размера, а приём тела запроса и отдача
+ответа медленным клиентам идут в цикле событий и потоки не держат.
+Одна и та же пара ASGI_THREADS потоков обслуживает сотни открытых
+соединений, а нагрузку на БД ограничивает размер пула.
+"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+# Сколько кусков ответа поток может отдать вперёд медленного клиента.
+RESPONSE_QUEUE_SIZE = 8
+SPECIAL_HEADERS = {
+    'content-type': 'CONTENT_TYPE',
+    'content-length': 'CONTENT_LENGTH',
+}
+# Повторённые заголовки склеиваются через запятую, Cookie - через '; '.
+HEADER_SEPARATORS = {'HTTP_COOKIE': '; '}
+
+
+def wsgi_string(value):
+    """Строки окружения WSGI - байты, «упакованные» в latin-1."""
+    return value.encode('utf-8').decode('latin-1')
+
+
+def build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': wsgi_string(scope.get('root_path', '')),
+        'PATH_INFO': wsgi_string(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').lower()
+        key = SPECIAL_HEADERS.get(
+            name, 'HTTP_' + name.upper().replace('-', '_')
+        )
+        value = value.decode('latin-1')
+        if key in environ:
+            separator = HEADER_SEPARATORS.get(key, ',')
+            value = f'{environ[key]}{separator}{value}'
+        environ[key] = value
+    return environ
+
+
+class ASGIBridge:
+    """ASGI 3.0 приложение, которое вызывает WSGI-приложение в пуле."""
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса целиком или None, если клиент ушёл."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(RESPONSE_QUEUE_SIZE)
+        stopped = threading.Event()
+        worker = loop.run_in_executor(
+            self.executor, self.run_wsgi, build_environ(scope, body),
+            loop, queue, stopped,
+        )
+        try:
+            await self.send_response(queue, send)
+        finally:
+            # Клиент ушёл или send() упал: поток перестаёт отдавать куски,
+            # а очередь разбирается, чтобы put() в нём не ждал вечно.
+            stopped.set()
+            drain = asyncio.ensure_future(self.drain(queue))
+            try:
+                await worker
+            finally:
+                drain.cancel()
+
+    async def send_response(self, queue, send):
+        started = False
+        while True:
+            kind, payload = await queue.get()
+            if kind == 'start':
+                started = True
+                status, headers = payload
+                await send({
+                    'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [
+                        (name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in headers
+                    ],
+                })
+            elif kind == 'body':
+                await send({
+                    'type': 'http.response.body',
+                    'body': payload,
+                    'more_body': True,
+                })
+            else:
+                if not started:
+                    # Приложение упало, не начав ответ.
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 500,
+                        'headers': [(b'content-type', b'text/plain')],
+                    })
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+    async def drain(self, queue):
+        while True:
+            await queue.get()
+
+    def run_wsgi(self, environ, loop, queue, stopped):
+        """В потоке пула: вызывает приложение и отдаёт ответ в очередь.
+
+        put() ждёт места в очереди - поток не убегает вперёд клиента
+        больше чем на RESPONSE_QUEUE_SIZE кусков; после stopped ответ
+        дальше не читается. close() вызывается здесь же: Django
+        закрывает соединения с БД этого потока. Последним в очередь
+        всегда идёт 'end', даже если приложение упало.
+        """
+        def put(item):
+            if stopped.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return not stopped.is_set()
+
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started.append((status, headers))
+
+        response = None
+        try:
+            response = self.wsgi_application(environ, start_response)
+            if not put(('start', started[0])):
+                return
+            for chunk in response:
+                if chunk and not put(('body', chunk)):
+                    return
+        finally:
+            try:
+                if hasattr(response, 'close'):
+                    response.close()
+            finally:
+                put(('end', None))
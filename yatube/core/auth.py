@@ -0,0 +1,73 @@
+"""Пользователь запроса из двухуровневого кэша (core.cache).
+
+AuthenticationMiddleware на каждом запросе достаёт пользователя по id
+из сессии; CachedModelBackend берёт его из памяти процесса или общего
+кэша, а в базу идёт только при промахе. Сигналы из core.signals
+пишут пользователя в кэш при каждом сохранении (вход обновляет
+last_login, смена профиля и пароля) и удаляют при удалении.
+
+Хэша пароля в кэше нет: там значения полей без password и готовый
+get_session_auth_hash(), которым AuthenticationMiddleware проверяет
+сессию. У пользователя из кэша password - отложенное поле: тому, кому
+он нужен (проверка или смена пароля), его дочитают из базы.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache as shared
+
+from . import cache
+
+SKIPPED_FIELDS = ('password',)
+
+
+def user_cache_key(user_id):
+    return f'core:user:{user_id}'
+
+
+def cache_user(user):
+    """Кладёт значения полей пользователя без пароля и хэш сессии."""
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.attname not in SKIPPED_FIELDS
+    }
+    cache.set(
+        shared, user_cache_key(user.pk),
+        (fields, user.get_session_auth_hash()),
+        settings.CORE_USER_CACHE_TIMEOUT,
+    )
+
+
+def forget_user(user_id):
+    cache.delete(shared, user_cache_key(user_id))
+
+
+def cached_user(user_id):
+    """Пользователь из кэша или None при промахе."""
+    entry = cache.get(shared, user_cache_key(user_id))
+    if entry is None:
+        return None
+    fields, session_hash = entry
+    model = get_user_model()
+    user = model.from_db(None, list(fields), list(fields.values()))
+
+    def get_session_auth_hash():
+        # После set_password или чтения пароля хэш считается заново.
+        if 'password' in user.__dict__:
+            return model.get_session_auth_hash(user)
+        return session_hash
+
+    user.get_session_auth_hash = get_session_auth_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        user = cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache_user(user)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,73 @@
+"""Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+Чтение сначала ищет в памяти процесса, потом в общем кэше (и кладёт
+найденное в память); запись и удаление идут в оба уровня. Другой
+процесс узнаёт об изменении не позже чем через
+CORE_LOCAL_CACHE_TIMEOUT секунд - на столько запись живёт в памяти.
+Значения хранятся копиями (pickle): изменения объекта в одном запросе
+не видны в других потоках.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LocalCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = time.monotonic() + settings.CORE_LOCAL_CACHE_TIMEOUT
+        with self.lock:
+            self.entries[key] = (expires, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.CORE_LOCAL_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local = LocalCache()
+
+
+def get(shared, key):
+    """Значение из памяти процесса или из кэша shared; None - промах."""
+    value = local.get(key)
+    if value is None:
+        value = shared.get(key)
+        if value is not None:
+            local.set(key, value)
+    return value
+
+
+def set(shared, key, value, timeout):
+    shared.set(key, value, timeout)
+    local.set(key, value)
+
+
+def delete(shared, key):
+    shared.delete(key)
+    local.delete(key)
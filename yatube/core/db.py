@@ -0,0 +1,13 @@
+from django.db import connections, router
+
+
+def bulk_batch_size(model, batch_size):
+    """batch_size для bulk_create, урезанный до лимита СУБД.
+
+    Django 2.2 не урезает явно переданный batch_size, а SQLite не
+    принимает больше 999 параметров и 500 строк в одном INSERT.
+    """
+    connection = connections[router.db_for_write(model)]
+    fields = model._meta.concrete_fields
+    limit = connection.ops.bulk_batch_size(fields, [None] * batch_size)
+    return max(min(batch_size, limit), 1)
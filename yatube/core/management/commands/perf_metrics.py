@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.metrics import collect, render_prometheus
+from core.tasks import queue_stats, render_queue_metrics
+
+
+class Command(BaseCommand):
+    help = ('Выводит гистограммы времени ответа по представлениям '
+            'и состояние очереди задач в формате Prometheus.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(render_prometheus(collect()), ending='')
+        self.stdout.write(
+            render_queue_metrics(queue_stats()), ending=''
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.metrics import registry
+from core.tasks import run_batch
+
+
+class Command(BaseCommand):
+    help = ('Выполняет задачи из очереди core.tasks '
+            '(settings.CORE_TASKS_ASYNC = True).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.CORE_TASKS_BATCH_SIZE,
+            help='Задач в одной пачке.',
+        )
+        parser.add_argument(
+            '--idle-sleep', type=float, default=1.0,
+            help='Пауза, когда готовых задач нет, секунд.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        try:
+            while True:
+                close_old_connections()
+                batch_done, batch_failed = run_batch(options['batch_size'])
+                registry.publish(settings.CORE_METRICS_PUBLISH_INTERVAL)
+                done += batch_done
+                failed += batch_failed
+                if batch_failed:
+                    self.stderr.write(
+                        f'Задач с ошибкой: {batch_failed}, '
+                        'текст ошибки - в core_task.last_error'
+                    )
+                if batch_done or batch_failed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['idle_sleep'])
+        except KeyboardInterrupt:
+            pass
+        registry.publish()
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = ('Копирует базу default в файлы реплик SQLite - для локальной '
+            'проверки чтения из реплик.')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплик нет: задайте YATUBE_DB_REPLICAS')
+        databases = [
+            connections[alias].settings_dict
+            for alias in ['default', *settings.DATABASE_REPLICAS]
+        ]
+        if any(db['ENGINE'] != SQLITE_ENGINE for db in databases):
+            raise CommandError('Команда умеет копировать только SQLite')
+        source = sqlite3.connect(databases[0]['NAME'])
+        try:
+            for alias, db in zip(settings.DATABASE_REPLICAS, databases[1:]):
+                target = sqlite3.connect(db['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {db["NAME"]}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
@@ -0,0 +1,202 @@
+"""Гистограммы времени ответа по представлениям.
+
+Каждый процесс копит свои гистограммы в памяти и время от времени
+выкладывает снимок в свой файл в settings.CORE_METRICS_DIR - оттуда
+их собирают команда perf_metrics и страница /metrics/ в формате
+Prometheus. Кэш для этого не годится: LocMemCache у каждого процесса
+свой. Файл пишет только его процесс, поэтому общих записей, которые
+надо было бы менять под блокировкой, нет.
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+LAG_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+# Имя метрики: (подсказка для Prometheus, границы корзин).
+METRICS = {
+    'request_duration_seconds': (
+        'Время обработки запроса', SECONDS_BUCKETS,
+    ),
+    'sql_queries': ('Число SQL-запросов за запрос', QUERIES_BUCKETS),
+    'sql_duration_seconds': ('Время SQL-запросов', SECONDS_BUCKETS),
+    'template_duration_seconds': (
+        'Время рендеринга шаблонов', SECONDS_BUCKETS,
+    ),
+    'response_size_bytes': ('Размер ответа', BYTES_BUCKETS),
+    # Для задач core.tasks вместо представления - имя задачи.
+    'task_duration_seconds': (
+        'Время выполнения пачки задач', SECONDS_BUCKETS,
+    ),
+    'task_lag_seconds': (
+        'Задержка выполнения задачи после срока', LAG_BUCKETS,
+    ),
+}
+PREFIX = 'yatube_'
+SNAPSHOT_SUFFIX = '.json'
+# Снимки процессов, не обновлявшиеся столько секунд, удаляются.
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+# Больше снимков collect() не читает: берёт самые свежие.
+MAX_SNAPSHOTS = 256
+
+
+class Histogram:
+    """Счётчики по корзинам «не больше границы», сумма и число."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, state):
+        counts, total, count = state
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def state(self):
+        return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    """Гистограммы процесса по (метрике, представлению)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.published = 0
+
+    def observe(self, view, **values):
+        with self.lock:
+            for metric, value in values.items():
+                key = (metric, view)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(METRICS[metric][1])
+                self.histograms[key].observe(value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: histogram.state()
+                for key, histogram in self.histograms.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def publish(self, interval=0):
+        """Пишет снимок процесса в файл, не чаще раза в interval секунд."""
+        now = time.monotonic()
+        if interval and now - self.published < interval:
+            return
+        self.published = now
+        directory = settings.CORE_METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        name = f'{socket.gethostname()}-{os.getpid()}{SNAPSHOT_SUFFIX}'
+        rows = [
+            [metric, view, *state]
+            for (metric, view), state in self.snapshot().items()
+        ]
+        # Читатель видит либо прежний файл, либо новый целиком.
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(rows, file)
+        os.replace(temporary, os.path.join(directory, name))
+
+
+registry = Registry()
+
+
+def snapshot_files():
+    """Файлы снимков, от свежих к старым; устаревшие удаляются."""
+    directory = settings.CORE_METRICS_DIR
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    expired = time.time() - SNAPSHOT_TIMEOUT
+    files = []
+    for name in names:
+        if not name.endswith(SNAPSHOT_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            modified = os.path.getmtime(path)
+            if modified < expired:
+                os.remove(path)
+                continue
+        except FileNotFoundError:
+            continue
+        files.append((modified, path))
+    return [path for modified, path in sorted(files, reverse=True)]
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def collect():
+    """Сумма снимков всех процессов: {(метрика, view): Histogram}."""
+    merged = {}
+    for path in snapshot_files()[:MAX_SNAPSHOTS]:
+        for metric, view, *state in read_snapshot(path):
+            if metric not in METRICS:
+                continue
+            if (metric, view) not in merged:
+                merged[metric, view] = Histogram(METRICS[metric][1])
+            merged[metric, view].merge(state)
+    return merged
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(histograms):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for metric, (help_text, buckets) in METRICS.items():
+        name = PREFIX + metric
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        views = sorted(view for key, view in histograms if key == metric)
+        for view in views:
+            histogram = histograms[metric, view]
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(
+                buckets + ('+Inf',), histogram.counts
+            ):
+                cumulative += count
+                le = bound if bound == '+Inf' else format_number(bound)
+                lines.append(
+                    f'{name}_bucket{{view="{label}",le="{le}"}} {cumulative}'
+                )
+            lines.append(
+                f'{name}_sum{{view="{label}"}} '
+                f'{format_number(histogram.sum)}'
+            )
+            lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
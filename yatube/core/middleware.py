@@ -0,0 +1,221 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import profiling
+from .metrics import registry
+from .routers import (PIN_COOKIE, choose_replica, release_replica,
+                      use_replica)
+from .staticfiles import static_response
+
+UNRESOLVED_VIEW = '<unresolved>'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Сколько шаблонов показывать в заголовке Server-Timing.
+SERVER_TIMING_TEMPLATES = 15
+
+
+def server_timing(render_stats):
+    """Заголовок Server-Timing: собственное время самых медленных
+    шаблонов, в desc - имя шаблона, полное время и число рендеров.
+    """
+    entries = []
+    rows = render_stats.slowest(SERVER_TIMING_TEMPLATES)
+    for number, (name, count, total, own) in enumerate(rows):
+        name = name.replace('"', "'")
+        entries.append(
+            f'tpl{number};dur={own * 1000:.2f};'
+            f'desc="{name} x{count}, {total * 1000:.2f}ms"'
+        )
+    return ', '.join(entries)
+
+
+class ObservedStream:
+    """Тело потокового ответа, которое считает отданные байты.
+
+    Куски читаются под measuring(): SQL и шаблоны, которые выполняются
+    при отдаче тела, попадают в метрики запроса. finish(размер)
+    вызывается один раз - после последнего куска или при закрытии
+    ответа, если клиент ушёл раньше.
+    """
+
+    def __init__(self, chunks, measuring, finish):
+        self.chunks = iter(chunks)
+        self.measuring = measuring
+        self.finish = finish
+        self.size = 0
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            with self.measuring():
+                chunk = next(self.chunks)
+        except StopIteration:
+            self.close()
+            raise
+        self.size += len(chunk)
+        return chunk
+
+    def close(self):
+        if not self.finished:
+            self.finished = True
+            self.finish(self.size)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL через execute_wrapper, шаблоны -
+    через core.profiling, если он включён."""
+
+    def __init__(self, request):
+        self.request = request
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.render_stats = (
+            profiling.RenderStats(per_template=True)
+            if settings.CORE_TEMPLATE_PROFILING else None
+        )
+
+    def count_sql(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - start
+
+    @contextmanager
+    def measuring(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(self.count_sql)
+                )
+            if self.render_stats is not None:
+                profiling.activate(self.render_stats)
+            try:
+                yield
+            finally:
+                profiling.stop()
+
+    def finish(self, size):
+        match = self.request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        values = {
+            'request_duration_seconds': time.perf_counter() - self.start,
+            'sql_queries': self.queries,
+            'sql_duration_seconds': self.sql,
+            'response_size_bytes': size,
+        }
+        if self.render_stats is not None:
+            values['template_duration_seconds'] = self.render_stats.total
+        registry.observe(view, **values)
+        registry.publish(settings.CORE_METRICS_PUBLISH_INTERVAL)
+
+
+class PerformanceMiddleware:
+    """Пишет в core.metrics время, SQL и размер каждого ответа, а при
+    settings.CORE_TEMPLATE_PROFILING - и время шаблонов.
+
+    Для потокового ответа метрики пишутся, когда отдано всё тело.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics(request)
+        with metrics.measuring():
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = ObservedStream(
+                response.streaming_content, metrics.measuring, metrics.finish
+            )
+        else:
+            metrics.finish(len(response.content))
+        render_stats = metrics.render_stats
+        if render_stats is not None and render_stats.templates:
+            response['Server-Timing'] = server_timing(render_stats)
+        return response
+
+
+class ReplicaRelease:
+    """Освобождает реплику запроса; close() зовёт HttpResponse.close()."""
+
+    def __init__(self, replica):
+        self.replica = replica
+
+    def close(self):
+        if self.replica is not None:
+            release_replica(self.replica)
+        use_replica(None)
+
+
+class ReplicaMiddleware:
+    """Направляет чтения представлений из REPLICA_VIEWS в реплики.
+
+    Потоковый ответ читает базу, пока отдаётся тело, поэтому реплика
+    освобождается при закрытии ответа, а не сразу после представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica = None
+        try:
+            response = self.get_response(request)
+        except Exception:
+            ReplicaRelease(request.replica).close()
+            raise
+        release = ReplicaRelease(request.replica)
+        if response.streaming:
+            response._closable_objects.append(release)
+        else:
+            release.close()
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+        ):
+            request.replica = choose_replica()
+        use_replica(request.replica)
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику до сессий, авторизации и метрик.
+
+    Включается settings.CORE_SERVE_STATIC, когда перед приложением нет
+    nginx или CDN, которые раздают STATIC_ROOT сами.
+    """
+
+    def __init__(self, get_response):
+        if not settings.CORE_SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+
+    def __call__(self, request):
+        if (
+            request.method in SAFE_METHODS
+            and request.path_info.startswith(self.prefix)
+        ):
+            response = static_response(
+                request, request.path_info[len(self.prefix):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
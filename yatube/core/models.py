@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Отложенная задача очереди core.tasks.
+
+    Выполненные задачи удаляются; исчерпавшие попытки остаются с
+    текстом последней ошибки.
+    """
+    name = models.CharField(max_length=100, verbose_name="Задача")
+    payload = models.TextField(verbose_name="Аргумент (JSON)")
+    created = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Поставлена в очередь")
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Выполнить не раньше")
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Занята обработчиком до")
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('run_after', 'id'),
+                         name='task_run_after_idx'),
+        )
+        verbose_name = "задача"
+        verbose_name_plural = "задачи"
+
+    def __str__(self):
+        return f'{self.name}({self.payload})'
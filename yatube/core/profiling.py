@@ -0,0 +1,110 @@
+"""Время рендеринга шаблонов в пределах одного запроса.
+
+Включается settings.CORE_TEMPLATE_PROFILING: тогда CoreConfig.ready
+подменяет Template._render (install). Без настройки шаблоны рендерятся
+исходным методом. Вне запроса, который ведёт
+core.middleware.PerformanceMiddleware, подмена сразу вызывает исходный
+метод. В запросе время каждого шаблона (с {% extends %} и {% include %}
+внутри) считается по стеку: общее время верхнего уровня идёт в метрику,
+время каждого шаблона - полное и «собственное» без вложенных - в
+заголовок Server-Timing.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.template.base import Template
+
+STRING_TEMPLATE = '<string>'
+
+_local = threading.local()
+_original_render = Template._render
+
+
+class RenderStats:
+    def __init__(self, per_template=False):
+        self.total = 0.0
+        self.stack = []
+        # Имя шаблона: [число рендеров, полное время, собственное время].
+        self.templates = defaultdict(lambda: [0, 0.0, 0.0]) if (
+            per_template
+        ) else None
+
+    def enter(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, children = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        else:
+            self.total += elapsed
+        if self.templates is not None:
+            record = self.templates[name]
+            record[0] += 1
+            record[1] += elapsed
+            record[2] += elapsed - children
+
+    def slowest(self, limit):
+        """[(имя, число, полное, собственное)] по убыванию своего времени."""
+        rows = [(name, *record) for name, record in self.templates.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)[:limit]
+
+
+def start(per_template=True):
+    return activate(RenderStats(per_template))
+
+
+def activate(stats):
+    """Продолжает запись в stats, например пока отдаётся потоковый ответ."""
+    _local.stats = stats
+    return stats
+
+
+def stop():
+    _local.stats = None
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def measure(name):
+    """Засекает фрагмент (например, встроенный шаблон) как шаблон name."""
+    stats = current()
+    if stats is None:
+        yield
+        return
+    stats.enter(name)
+    try:
+        yield
+    finally:
+        stats.exit()
+
+
+def _profiled_render(self, context):
+    stats = current()
+    if stats is None:
+        return _original_render(self, context)
+    stats.enter(self.origin.template_name or STRING_TEMPLATE)
+    try:
+        return _original_render(self, context)
+    finally:
+        stats.exit()
+
+
+def install():
+    # Исходным считаем текущий метод: тестовый раннер Django тоже
+    # подменяет Template._render, и его подмена должна остаться.
+    global _original_render
+    if Template._render is not _profiled_render:
+        _original_render = Template._render
+        Template._render = _profiled_render
+
+
+def uninstall():
+    if Template._render is _profiled_render:
+        Template._render = _original_render
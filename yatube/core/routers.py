@@ -0,0 +1,75 @@
+"""Чтение из реплик для представлений, которые ничего не пишут.
+
+ReplicaMiddleware выбирает реплику один раз на запрос - только для
+безопасных запросов к представлениям из settings.REPLICA_VIEWS - и
+кладёт её в состояние потока; ReplicaRouter отправляет туда чтения.
+Всё остальное, а также чтения после первой записи в том же запросе,
+идёт в default. После записи клиент получает cookie, и несколько
+секунд все его запросы читают с default: он видит свои изменения,
+даже если реплика отстаёт.
+"""
+import threading
+from itertools import count
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_pin'
+
+_state = threading.local()
+_lock = threading.Lock()
+_turn = count()
+# Число запросов процесса, которые сейчас читают с каждой реплики.
+_in_flight = {}
+
+
+def replicas():
+    return list(settings.DATABASE_REPLICAS)
+
+
+def choose_replica():
+    """Реплика по settings.REPLICA_SELECTION или None, если их нет."""
+    aliases = replicas()
+    if not aliases:
+        return None
+    with _lock:
+        if settings.REPLICA_SELECTION == 'least_loaded':
+            alias = min(aliases, key=lambda name: _in_flight.get(name, 0))
+        else:
+            alias = aliases[next(_turn) % len(aliases)]
+        _in_flight[alias] = _in_flight.get(alias, 0) + 1
+    return alias
+
+
+def release_replica(alias):
+    with _lock:
+        _in_flight[alias] -= 1
+
+
+def use_replica(alias):
+    _state.replica = alias
+    _state.wrote = False
+
+
+def current_replica():
+    if getattr(_state, 'wrote', False):
+        return None
+    return getattr(_state, 'replica', None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return current_replica() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Дальше в этом запросе читаем своё же - только с default.
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает в реплики вместе с данными.
+        return db not in replicas()
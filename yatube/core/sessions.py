@@ -0,0 +1,38 @@
+"""Сессии: память процесса -> общий кэш -> таблица django_session.
+
+Движок для settings.SESSION_ENGINE поверх cached_db: сохранение пишет
+в базу и в оба уровня кэша (core.cache), удаление при выходе и смене
+ключа при входе убирают сессию из обоих, чтение обычно не доходит
+даже до общего кэша.
+"""
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+
+from . import cache
+
+KEY_PREFIX = 'core.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def load(self):
+        data = cache.local.get(self.cache_key)
+        if data is not None:
+            return data
+        data = super().load()
+        # Сессии нет в базе - load() сбросил ключ, кэшировать нечего.
+        if self._session_key is not None:
+            cache.local.set(self.cache_key, data)
+        return data
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        cache.local.set(self.cache_key, self._session)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is not None:
+            cache.local.delete(self.cache_key_prefix + session_key)
+        super().delete(session_key)
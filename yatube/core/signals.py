@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from . import profiling
+from .auth import cache_user, forget_user
+
+User = get_user_model()
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """PRAGMA из settings.SQLITE_PRAGMAS для каждого нового соединения."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(setting_changed)
+def toggle_profiling(setting, **kwargs):
+    """override_settings(CORE_TEMPLATE_PROFILING=...) в тестах."""
+    if setting == 'CORE_TEMPLATE_PROFILING':
+        if settings.CORE_TEMPLATE_PROFILING:
+            profiling.install()
+        else:
+            profiling.uninstall()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """Вход (last_login), смена профиля или пароля: пишем в кэш.
+
+    До коммита в кэше пользователя нет - откат не оставит там
+    несохранённых данных.
+    """
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: cache_user(instance))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
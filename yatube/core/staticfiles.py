@@ -0,0 +1,77 @@
+"""Отдача собранной статики из STATIC_ROOT прямо из приложения.
+
+Файл с хешем в имени (есть в манифесте) неизменяем: Cache-Control на
+год с immutable, браузер его больше не перепроверяет. Остальные файлы
+кэшируются на CORE_STATIC_MAX_AGE секунд и проверяются по
+Last-Modified. Если клиент принимает br или gzip и рядом лежит сжатая
+копия из core.storage, отдаётся она.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Порядок предпочтения: brotli сжимает лучше.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00',
+                                           'q=0.000'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def is_hashed(path):
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    return path in hashed_files.values()
+
+
+def static_response(request, path):
+    """Ответ с файлом path из STATIC_ROOT или None, если файла нет."""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    if not os.path.isfile(full_path):
+        return None
+    stat = os.stat(full_path)
+    hashed = is_hashed(path)
+    if not hashed and not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+    content_type = mimetypes.guess_type(full_path)[0]
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    file_path, encoding = full_path, None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            file_path, encoding = full_path + suffix, name
+            break
+    response = FileResponse(open(file_path, 'rb'))
+    # FileResponse угадал бы тип по .gz/.br - ставим тип оригинала.
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if hashed:
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.CORE_STATIC_MAX_AGE}'
+        )
+    return response
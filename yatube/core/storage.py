@@ -0,0 +1,57 @@
+"""Хранилище статики: имена с хешем содержимого и сжатые копии.
+
+manage.py collectstatic - шаг сборки: ManifestStaticFilesStorage
+копирует файлы под именами вида bootstrap.min.3f2a….css и пишет
+staticfiles.json, а здесь для текстовых форматов рядом кладутся .gz и,
+если установлен brotli, .br - их отдаёт core.middleware.StaticFilesMiddleware.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - сборка без brotli отдаёт только gzip
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.ico',
+                '.map', '.xml')
+# Сжатая копия нужна, только если она заметно меньше оригинала.
+MIN_RATIO = 0.95
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # Без collectstatic (разработка, тесты) имени в манифесте нет:
+        # ссылаемся на исходный файл, он отдаётся без вечного кэша.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * MIN_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,166 @@
+"""Очередь задач в таблице core.Task для побочных эффектов записи.
+
+Обработчик регистрируется декоратором @task('имя') и получает аргументы
+пачкой; одинаковые аргументы в пачке схлопываются, а задача может
+выполниться повторно, так что обработчики должны быть идемпотентны.
+enqueue() пишет задачу в ту же транзакцию, что и породившую её запись:
+откат записи убирает и задачу. При settings.CORE_TASKS_ASYNC = False
+(разработка, тесты) задача выполняется сразу внутри enqueue(), кроме
+фоновых (@task(..., background=True)): они слишком тяжелы для запроса
+и всегда ждут обработчика.
+
+Задачи выполняет manage.py run_tasks: берёт пачку, вызывает обработчики
+по именам, выполненные задачи удаляет, а при ошибке откладывает задачи
+с удвоением задержки. После CORE_TASKS_MAX_ATTEMPTS попыток задача
+остаётся в таблице с текстом ошибки. На PostgreSQL несколько
+обработчиков не мешают друг другу (SKIP LOCKED); на SQLite - один.
+"""
+import json
+import time
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .metrics import PREFIX, format_number, registry
+from .models import Task
+
+_handlers = {}
+_background = set()
+
+
+def task(name, background=False):
+    """Регистрирует обработчик пачки аргументов под именем name.
+
+    background=True - задача никогда не выполняется внутри enqueue().
+    """
+    def register(handler):
+        _handlers[name] = handler
+        if background:
+            _background.add(name)
+        return handler
+    return register
+
+
+def enqueue(name, payload):
+    """Ставит задачу name с JSON-сериализуемым аргументом payload."""
+    if name not in _handlers:
+        raise ValueError(f'Неизвестная задача: {name}')
+    if not settings.CORE_TASKS_ASYNC and name not in _background:
+        _handlers[name]([payload])
+        return
+    Task.objects.create(name=name, payload=json.dumps(payload))
+
+
+def pending():
+    return Task.objects.filter(attempts__lt=settings.CORE_TASKS_MAX_ATTEMPTS)
+
+
+def claim(batch_size, now):
+    """Готовые задачи, занятые на CORE_TASKS_LEASE секунд."""
+    free = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    queryset = pending().filter(free, run_after__lte=now).order_by(
+        'run_after', 'id'
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        tasks = list(queryset[:batch_size])
+        Task.objects.filter(pk__in=[item.pk for item in tasks]).update(
+            locked_until=now + timedelta(seconds=settings.CORE_TASKS_LEASE)
+        )
+    return tasks
+
+
+def retry(tasks, error):
+    now = timezone.now()
+    for item in tasks:
+        item.attempts += 1
+        item.last_error = error
+        item.locked_until = None
+        item.run_after = now + timedelta(
+            seconds=settings.CORE_TASKS_RETRY_DELAY * 2 ** (item.attempts - 1)
+        )
+        item.save(update_fields=(
+            'attempts', 'last_error', 'locked_until', 'run_after'
+        ))
+
+
+def run_group(name, tasks, now):
+    """Выполняет задачи одного имени; True, если без ошибки."""
+    payloads = {item.payload: None for item in tasks}
+    start = time.perf_counter()
+    try:
+        with transaction.atomic():
+            _handlers[name]([json.loads(raw) for raw in payloads])
+    except Exception:
+        retry(tasks, traceback.format_exc())
+        return False
+    Task.objects.filter(pk__in=[item.pk for item in tasks]).delete()
+    registry.observe(
+        name,
+        task_duration_seconds=time.perf_counter() - start,
+        task_lag_seconds=max(
+            (now - item.run_after).total_seconds() for item in tasks
+        ),
+    )
+    return True
+
+
+def run_batch(batch_size=None):
+    """Выполняет одну пачку задач; возвращает (выполнено, с ошибкой)."""
+    now = timezone.now()
+    groups = defaultdict(list)
+    for item in claim(batch_size or settings.CORE_TASKS_BATCH_SIZE, now):
+        groups[item.name].append(item)
+    done = failed = 0
+    for name, tasks in groups.items():
+        if run_group(name, tasks, now):
+            done += len(tasks)
+        else:
+            failed += len(tasks)
+    return done, failed
+
+
+def queue_stats(now=None):
+    """{имя: (ждут выполнения, отставание в секундах, без попыток)}."""
+    now = now or timezone.now()
+    alive = Q(attempts__lt=settings.CORE_TASKS_MAX_ATTEMPTS)
+    rows = Task.objects.order_by().values('name').annotate(
+        waiting=Count('id', filter=alive),
+        dead=Count('id', filter=~alive),
+        oldest=Min('run_after', filter=alive),
+    )
+    return {
+        row['name']: (
+            row['waiting'],
+            max((now - row['oldest']).total_seconds(), 0)
+            if row['oldest'] else 0,
+            row['dead'],
+        )
+        for row in rows
+    }
+
+
+QUEUE_GAUGES = (
+    ('task_queue_depth', 'Задач ждёт выполнения'),
+    ('task_queue_lag_seconds', 'Сколько ждёт самая старая готовая задача'),
+    ('task_queue_dead', 'Задач, исчерпавших попытки'),
+)
+
+
+def render_queue_metrics(stats):
+    """Глубина и отставание очереди в формате Prometheus."""
+    lines = []
+    for number, (metric, help_text) in enumerate(QUEUE_GAUGES):
+        name = PREFIX + metric
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for task_name in sorted(stats):
+            value = format_number(stats[task_name][number])
+            lines.append(f'{name}{{task="{task_name}"}} {value}')
+    return '\n'.join(lines) + '\n'
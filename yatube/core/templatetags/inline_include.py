@@ -0,0 +1,38 @@
+from django import template
+from django.template.base import Node, TemplateSyntaxError
+from django.template.engine import Engine
+
+from core import profiling
+
+register = template.Library()
+
+
+class InlineIncludeNode(Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        with profiling.measure(f'inline:{self.name}'):
+            return self.nodelist.render(context)
+
+
+@register.tag
+def inline_include(parser, token):
+    """{% include %}, который встраивается при компиляции шаблона.
+
+    Узлы подключаемого шаблона становятся частью родителя: в цикле по
+    постам не остаётся поиска шаблона, проверки кэша include и отдельного
+    Template.render на каждой итерации. Имя - только строковая константа,
+    with/only не поддерживаются; подключённый шаблон обновится вместе с
+    родителем (при cached loader - после перезапуска).
+    """
+    bits = token.split_contents()
+    if len(bits) != 2 or bits[1][0] not in '"\'' or bits[1][0] != bits[1][-1]:
+        raise TemplateSyntaxError(
+            f'{bits[0]} принимает одно имя шаблона в кавычках'
+        )
+    name = bits[1][1:-1]
+    engine = getattr(getattr(parser.origin, 'loader', None), 'engine', None)
+    included = (engine or Engine.get_default()).get_template(name)
+    return InlineIncludeNode(name, included.nodelist)
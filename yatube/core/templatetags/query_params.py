@@ -0,0 +1,16 @@
+from django import template
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def replace_query(context, **params):
+    """Текущий query string с заменёнными параметрами.
+
+    Нужен ссылкам пагинатора, чтобы не терять ?q= и другие параметры.
+    """
+    query = context['request'].GET.copy()
+    for key, value in params.items():
+        query[key] = value
+    return query.urlencode()
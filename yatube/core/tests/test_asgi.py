@@ -0,0 +1,189 @@
+import asyncio
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from benchmarks.concurrency import compare, http_scope
+from benchmarks.data import generate
+from core.asgi import RESPONSE_QUEUE_SIZE, ASGIBridge
+
+
+def call(application, scope, body=b'', chunk=3):
+    """Прогоняет один запрос через ASGI-приложение, тело - кусками."""
+    pieces = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+    messages = [
+        {'type': 'http.request', 'body': piece,
+         'more_body': number < len(pieces) - 1}
+        for number, piece in enumerate(pieces or [b''])
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ASGIBridgeTests(SimpleTestCase):
+    def setUp(self):
+        self.environs = []
+        self.closed = []
+
+        class Response(list):
+            def close(response):
+                self.closed.append(True)
+
+        def wsgi_app(environ, start_response):
+            self.environs.append(environ)
+            start_response('201 Created', [('X-Test', 'да'.encode().decode(
+                'latin-1'))])
+            return Response([b'a', b'', b'bc', environ['wsgi.input'].read()])
+
+        self.bridge = ASGIBridge(wsgi_app, max_workers=2)
+        self.addCleanup(self.bridge.executor.shutdown)
+
+    def test_request_and_response_translated(self):
+        """Заголовки, путь и тело доходят до WSGI, ответ - кусками."""
+        scope = http_scope('/путь/?page=2')
+        scope['method'] = 'POST'
+        scope['headers'] += [
+            (b'content-type', b'text/plain'), (b'x-a', b'1'), (b'x-a', b'2'),
+            (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+        ]
+        sent = call(self.bridge, scope, body=b'payload')
+        environ = self.environs[0]
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/путь/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_A'], '1,2')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertEqual(
+            sent[0]['headers'], [(b'x-test', 'да'.encode())]
+        )
+        self.assertEqual(
+            b''.join(message['body'] for message in sent[1:]),
+            b'abcpayload'
+        )
+        self.assertNotIn('more_body', sent[-1])
+        self.assertEqual(self.closed, [True])
+
+    def test_disconnect_before_body(self):
+        """Клиент ушёл до конца тела - приложение не вызывается."""
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            raise AssertionError(message)
+
+        asyncio.run(self.bridge(http_scope('/'), receive, send))
+        self.assertEqual(self.environs, [])
+
+    def test_disconnect_mid_stream_frees_worker(self):
+        """send() упал на середине ответа - поток пула освобождается."""
+        produced = []
+
+        def chunks():
+            for number in range(RESPONSE_QUEUE_SIZE * 10):
+                produced.append(number)
+                yield b'chunk'
+
+        def endless(environ, start_response):
+            start_response('200 OK', [])
+            return chunks()
+
+        bridge = ASGIBridge(endless, max_workers=1)
+        self.addCleanup(bridge.executor.shutdown)
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise OSError('клиент ушёл')
+
+        async def serve():
+            with self.assertRaises(OSError):
+                await asyncio.wait_for(
+                    bridge(http_scope('/'), receive, send), timeout=5
+                )
+
+        asyncio.run(serve())
+        self.assertLess(len(produced), RESPONSE_QUEUE_SIZE * 10)
+        # Единственный поток пула снова свободен.
+        self.assertEqual(bridge.executor.submit(int, '1').result(1), 1)
+
+    def test_application_error_ends_response(self):
+        def broken(environ, start_response):
+            raise RuntimeError('ошибка')
+
+        bridge = ASGIBridge(broken, max_workers=1)
+        self.addCleanup(bridge.executor.shutdown)
+        sent = []
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(bridge(http_scope('/'), receive, send))
+        self.assertEqual(sent[0]['status'], 500)
+        self.assertEqual(sent[-1], {'type': 'http.response.body', 'body': b''})
+
+    def test_lifespan(self):
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.bridge({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+
+class ASGIDeploymentTests(TransactionTestCase):
+    # Потоки пула открывают свои соединения и не видят транзакцию
+    # TestCase, поэтому данные должны быть закоммичены.
+
+    def setUp(self):
+        generate(authors=2, posts=12, groups=1, seed=1)
+
+    def test_feed_served_through_asgi(self):
+        from yatube.asgi import application
+
+        sent = call(application, http_scope(reverse('posts:index')))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            'Последние обновления'.encode(),
+            b''.join(message.get('body', b'') for message in sent[1:])
+        )
+
+    def test_load_test_scales(self):
+        """При медленных клиентах ASGI с тем же пулом обгоняет WSGI."""
+        results = compare(levels=(1, 8), threads=2, client_delay=0.05,
+                          rounds=2)
+        self.assertEqual(
+            [(result.deployment, result.concurrency) for result in results],
+            [('wsgi', 1), ('asgi', 1), ('wsgi', 8), ('asgi', 8)]
+        )
+        for result in results:
+            self.assertEqual(result.errors, 0)
+        wsgi, asgi = results[2:]
+        self.assertGreater(asgi.throughput, wsgi.throughput * 1.5)
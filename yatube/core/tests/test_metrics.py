@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.metrics import (SNAPSHOT_TIMEOUT, Histogram, collect,
+                          registry)
+from posts.models import Post, User
+
+
+@override_settings(CORE_METRICS_PUBLISH_INTERVAL=0)
+class PerformanceMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        # Снимки - в своём каталоге: файлы других тестов не мешают.
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        metrics_dir = override_settings(CORE_METRICS_DIR=self.directory)
+        metrics_dir.enable()
+        self.addCleanup(metrics_dir.disable)
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_histogram_buckets(self):
+        """Значение попадает в первую корзину, граница которой не меньше."""
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual((histogram.sum, histogram.count), (14, 4))
+
+    @override_settings(CORE_TEMPLATE_PROFILING=True)
+    def test_request_recorded_per_view(self):
+        """Запрос пишет в гистограммы время, SQL, шаблоны и размер."""
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        snapshot = registry.snapshot()
+        for metric in ('request_duration_seconds', 'sql_queries',
+                       'sql_duration_seconds', 'template_duration_seconds',
+                       'response_size_bytes'):
+            with self.subTest(metric=metric):
+                self.assertEqual(snapshot[metric, 'posts:profile'][2], 1)
+        self.assertEqual(
+            snapshot['response_size_bytes', 'posts:profile'][1],
+            len(response.content)
+        )
+        self.assertGreater(snapshot['sql_queries', 'posts:profile'][1], 0)
+        self.assertGreater(
+            snapshot['template_duration_seconds', 'posts:profile'][1], 0
+        )
+
+    @override_settings(POSTS_STREAMING_FEEDS=True)
+    def test_streaming_response_recorded_after_body(self):
+        """Потоковый ответ попадает в метрики, когда отдано всё тело:
+        с его размером и запросами, выполненными при отдаче."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.staff_client.get(reverse('posts:index'))
+            self.assertTrue(response.streaming)
+            self.assertEqual(registry.snapshot(), {})
+            body = b''.join(response.streaming_content)
+        snapshot = registry.snapshot()
+        self.assertEqual(
+            snapshot['response_size_bytes', 'posts:index'][1:],
+            (len(body), 1)
+        )
+        self.assertEqual(
+            snapshot['sql_queries', 'posts:index'][1], len(queries)
+        )
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """/metrics/ отдаёт Prometheus только сотрудникам."""
+        url = reverse('core:metrics')
+        self.assertEqual(self.guest_client.get(url).status_code, 302)
+        self.guest_client.get(reverse('posts:index'))
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, '# TYPE yatube_request_duration_seconds histogram'
+        )
+        self.assertContains(
+            response,
+            'yatube_sql_queries_count{view="posts:index"} 1'
+        )
+
+    def test_command_prints_published_metrics(self):
+        """manage.py perf_metrics собирает снимки из файлов процессов."""
+        self.guest_client.get(reverse('posts:index'))
+        out = StringIO()
+        call_command('perf_metrics', stdout=out)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 1',
+            out.getvalue()
+        )
+
+    def write_snapshot(self, name, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            json.dump(rows, file)
+        return path
+
+    def test_snapshots_of_other_processes_merged(self):
+        """collect() складывает файлы всех процессов, а устаревшие
+        удаляет."""
+        counts = [0] * 11 + [1]
+        self.write_snapshot('web-1.json', [
+            ['request_duration_seconds', 'posts:index', counts, 20.0, 1],
+        ])
+        stale = self.write_snapshot('web-2.json', [
+            ['request_duration_seconds', 'posts:index', counts, 30.0, 1],
+        ])
+        expired = time.time() - SNAPSHOT_TIMEOUT - 1
+        os.utime(stale, (expired, expired))
+        self.guest_client.get(reverse('posts:index'))
+        histogram = collect()['request_duration_seconds', 'posts:index']
+        self.assertEqual(histogram.count, 2)
+        self.assertGreater(histogram.sum, 20)
+        self.assertFalse(os.path.exists(stale))
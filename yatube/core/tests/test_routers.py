@@ -0,0 +1,100 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from core import routers
+from core.middleware import ReplicaMiddleware
+from posts.models import Post
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+
+    def route(self, method, url, cookies=None, write=False, streaming=False):
+        """Проводит запрос через ReplicaMiddleware и возвращает
+        (базу для чтения внутри представления, ответ).
+        """
+        request = getattr(self.factory, method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(request.path)
+        seen = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            seen.append(self.router.db_for_read(Post))
+            if streaming:
+                return StreamingHttpResponse(
+                    self.router.db_for_read(Post) for _ in range(1)
+                )
+            return HttpResponse()
+
+        def get_response(request):
+            # Так обработчик Django вызывает middleware перед view.
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaMiddleware(get_response)
+        response = middleware(request)
+        return seen[0], response
+
+    def test_read_views_use_replicas_round_robin(self):
+        """Ленты читают с реплик по очереди, вне запроса - default."""
+        url = reverse('posts:index')
+        used = [self.route('get', url)[0] for _ in range(4)]
+        self.assertEqual(set(used), set(REPLICAS))
+        self.assertNotEqual(used[0], used[1])
+        self.assertEqual(self.router.db_for_read(Post), routers.PRIMARY)
+
+    def test_other_views_and_writes_use_primary(self):
+        """Формы, POST и чтения после записи идут в default."""
+        self.assertEqual(
+            self.route('get', reverse('posts:post_create'))[0],
+            routers.PRIMARY
+        )
+        self.assertEqual(
+            self.route('post', reverse('posts:index'))[0], routers.PRIMARY
+        )
+        self.assertEqual(
+            self.route('get', reverse('posts:index'), write=True)[0],
+            routers.PRIMARY
+        )
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент с cookie читает с default."""
+        _, response = self.route('post', reverse('posts:post_create'))
+        cookie = response.cookies[routers.PIN_COOKIE]
+        self.assertTrue(cookie['max-age'])
+        db, _ = self.route(
+            'get', reverse('posts:index'),
+            cookies={routers.PIN_COOKIE: cookie.value},
+        )
+        self.assertEqual(db, routers.PRIMARY)
+
+    def test_streaming_body_reads_replica_until_close(self):
+        """Тело потокового ответа читает с той же реплики, а реплика
+        освобождается только при закрытии ответа."""
+        db, response = self.route(
+            'get', reverse('posts:index'), streaming=True
+        )
+        self.assertIn(db, REPLICAS)
+        self.assertEqual(routers._in_flight[db], 1)
+        self.assertEqual(
+            b''.join(response.streaming_content), db.encode()
+        )
+        response.close()
+        self.assertEqual(routers._in_flight[db], 0)
+        self.assertEqual(self.router.db_for_read(Post), routers.PRIMARY)
+
+    @override_settings(REPLICA_SELECTION='least_loaded')
+    def test_least_loaded_selection(self):
+        """Выбирается реплика с наименьшим числом запросов в работе."""
+        busy = routers.choose_replica()
+        self.addCleanup(routers.release_replica, busy)
+        db, _ = self.route('get', reverse('posts:index'))
+        self.assertNotEqual(db, busy)
@@ -0,0 +1,145 @@
+import pickle
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import cache as two_tier
+from core.auth import CachedModelBackend, user_cache_key
+from core.sessions import KEY_PREFIX
+from posts.models import User
+
+
+def tables(captured):
+    return ' '.join(query['sql'] for query in captured)
+
+
+class LocalCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.local = two_tier.LocalCache()
+
+    @override_settings(CORE_LOCAL_CACHE_SIZE=2)
+    def test_least_recently_used_evicted(self):
+        for key in 'abc':
+            self.local.set(key, key)
+            self.local.get('a')
+        self.assertEqual(
+            [self.local.get(key) for key in 'abc'], ['a', None, 'c']
+        )
+
+    @override_settings(CORE_LOCAL_CACHE_TIMEOUT=-1)
+    def test_expired(self):
+        self.local.set('a', 1)
+        self.assertIsNone(self.local.get('a'))
+
+    def test_values_are_copies(self):
+        """Изменения полученного объекта не портят кэш."""
+        self.local.set('a', {'items': [1]})
+        self.local.get('a')['items'].append(2)
+        self.assertEqual(self.local.get('a'), {'items': [1]})
+
+
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', password='password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        two_tier.local.clear()
+        self.client = Client()
+        self.client.login(username='reader', password='password')
+        self.url = reverse('posts:index')
+
+    def test_warm_request_skips_session_and_user_tables(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertNotIn('django_session', tables(captured))
+        self.assertNotIn('auth_user', tables(captured))
+
+    def test_local_tier_used_before_shared(self):
+        """Общий кэш пуст - хватает памяти процесса."""
+        self.client.get(self.url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertNotIn('django_session', tables(captured))
+
+    def test_logout_removes_session_from_both_tiers(self):
+        session_key = self.client.session.session_key
+        self.client.get(self.url)
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(two_tier.local.get(KEY_PREFIX + session_key))
+        self.assertIsNone(cache.get(KEY_PREFIX + session_key))
+        self.client.cookies['sessionid'] = session_key
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_inactive_user_rejected(self):
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
+
+    def test_password_hash_not_cached(self):
+        """В кэше нет хэша пароля; пароль дочитывается из базы."""
+        self.client.get(self.url)
+        entry = two_tier.get(cache, user_cache_key(self.user.pk))
+        self.assertNotIn(
+            self.user.password.encode(), pickle.dumps(entry)
+        )
+        user = CachedModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('password'))
+
+    def test_new_password_gives_new_session_hash(self):
+        """update_session_auth_hash после смены пароля пользователя из
+        кэша получает хэш нового пароля, а не закэшированный."""
+        self.client.get(self.url)
+        user = CachedModelBackend().get_user(self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        self.assertEqual(
+            user.get_session_auth_hash(),
+            User.objects.get(pk=user.pk).get_session_auth_hash(),
+        )
+
+    def test_model_backend_sessions_survive(self):
+        """Сессии, созданные с ModelBackend, остаются действительными."""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+
+class UserWriteThroughTests(TransactionTestCase):
+    def test_profile_change_written_to_cache(self):
+        """После коммита в кэше уже новый профиль - база не нужна."""
+        user = User.objects.create_user(username='reader')
+        user.first_name = 'Новое имя'
+        user.save()
+        fields, session_hash = cache.get(user_cache_key(user.pk))
+        self.assertEqual(fields['first_name'], 'Новое имя')
+        with self.assertNumQueries(0):
+            cached = CachedModelBackend().get_user(user.pk)
+        self.assertEqual(cached.first_name, 'Новое имя')
+        user.delete()
+        self.assertIsNone(two_tier.get(cache, user_cache_key(user.pk)))
@@ -0,0 +1,31 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.signals import tune_sqlite
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA из SQLite')
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connection(self):
+        """Обработчик connection_created выставляет PRAGMA из настроек."""
+        default = self.pragma('cache_size')
+        self.addCleanup(
+            connection.cursor().execute, f'PRAGMA cache_size = {default}'
+        )
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -1234}):
+            tune_sqlite(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), -1234)
+
+    def test_no_pragmas_by_default(self):
+        """Без продакшен-профиля соединение не трогаем."""
+        default = self.pragma('cache_size')
+        with override_settings(SQLITE_PRAGMAS={}):
+            tune_sqlite(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), default)
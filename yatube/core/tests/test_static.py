@@ -0,0 +1,112 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.staticfiles import accepted_encodings
+from posts.models import Group, Post, User
+
+STATIC_ROOT = tempfile.mkdtemp()
+BOOTSTRAP = 'css/bootstrap.min.css'
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, CORE_SERVE_STATIC=True)
+class CollectedStaticTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name(BOOTSTRAP)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_build_writes_hashed_and_compressed_files(self):
+        self.assertNotEqual(self.hashed, BOOTSTRAP)
+        path = os.path.join(STATIC_ROOT, self.hashed)
+        with open(path, 'rb') as original, \
+                gzip.open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        # PNG уже сжат - копии не нужны.
+        self.assertFalse(os.path.exists(os.path.join(
+            STATIC_ROOT, staticfiles_storage.stored_name('img/logo.png')
+            + '.gz'
+        )))
+
+    def test_hashed_file_is_immutable(self):
+        response = self.client.get('/static/' + self.hashed)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_variant_when_accepted(self):
+        response = self.client.get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with open(os.path.join(STATIC_ROOT, self.hashed), 'rb') as file:
+            self.assertEqual(body, file.read())
+
+    def test_unhashed_file_revalidated(self):
+        response = self.client.get('/static/' + BOOTSTRAP)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.client.get(
+            '/static/' + BOOTSTRAP,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_path_outside_static_root_not_served(self):
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_link_hashed_names(self):
+        response = self.client.get(reverse('about:author'))
+        self.assertContains(response, '/static/' + self.hashed, count=1)
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=1.0, br;q=0, identity'),
+            {'gzip', 'identity'},
+        )
+
+
+class AssetTagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст', group=cls.group
+        )
+
+    def test_stylesheet_linked_once(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('about:author'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, BOOTSTRAP, count=1)
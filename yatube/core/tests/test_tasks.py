@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import (enqueue, queue_stats, render_queue_metrics,
+                        run_batch, task)
+from posts.models import Post, User
+from posts.search import search_posts
+
+calls = []
+
+
+@task('tests.record')
+def record(payloads):
+    calls.append(sorted(payloads))
+
+
+@task('tests.background', background=True)
+def record_background(payloads):
+    calls.append(sorted(payloads))
+
+
+@task('tests.fail')
+def fail(payloads):
+    raise RuntimeError('обработчик упал')
+
+
+@override_settings(CORE_TASKS_ASYNC=True, CORE_TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        calls.clear()
+
+    def found(self, text):
+        return list(search_posts(Post.objects.all(), text))
+
+    @override_settings(CORE_TASKS_ASYNC=False)
+    def test_eager_mode_runs_inline(self):
+        """Без очереди пост попадает в поиск сразу при сохранении."""
+        post = Post.objects.create(author=self.user, text='Мгновенный')
+        self.assertEqual(self.found('Мгновенный'), [post])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(CORE_TASKS_ASYNC=False)
+    def test_background_task_always_queued(self):
+        """Фоновая задача не выполняется в запросе и без очереди."""
+        enqueue('tests.background', 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_batch(), (1, 0))
+        self.assertEqual(calls, [[1]])
+
+    def test_post_side_effects_deferred_to_worker(self):
+        """Индекс обновляется только после manage.py run_tasks."""
+        post = Post.objects.create(author=self.user, text='Отложенный')
+        self.assertEqual(self.found('Отложенный'), [])
+        self.assertEqual(queue_stats()['posts.search_index'][0], 1)
+        out = StringIO()
+        call_command('run_tasks', once=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(self.found('Отложенный'), [post])
+        post.delete()
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(self.found('Отложенный'), [])
+
+    def test_batch_collapses_duplicates(self):
+        """Пачка отдаёт обработчику каждый аргумент один раз."""
+        for payload in (1, 2, 1, 1):
+            enqueue('tests.record', payload)
+        self.assertEqual(run_batch(batch_size=3), (3, 0))
+        self.assertEqual(run_batch(), (1, 0))
+        self.assertEqual(calls, [[1, 2], [1]])
+
+    def test_rolled_back_write_drops_task(self):
+        with transaction.atomic():
+            enqueue('tests.record', 1)
+            transaction.set_rollback(True)
+        self.assertFalse(Task.objects.exists())
+
+    def test_unknown_task(self):
+        with self.assertRaises(ValueError):
+            enqueue('tests.missing', 1)
+
+    def test_failed_task_retried_with_backoff(self):
+        """Ошибка откладывает задачу; после всех попыток она остаётся."""
+        enqueue('tests.fail', 1)
+        self.assertEqual(run_batch(), (0, 1))
+        item = Task.objects.get()
+        self.assertEqual(item.attempts, 1)
+        self.assertIn('обработчик упал', item.last_error)
+        self.assertGreater(item.run_after, timezone.now())
+        # Пока срок повтора не наступил, задача не берётся.
+        self.assertEqual(run_batch(), (0, 0))
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(run_batch(), (0, 1))
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(run_batch(), (0, 0))
+        self.assertEqual(queue_stats()['tests.fail'], (0, 0, 1))
+
+    def test_queue_metrics(self):
+        """Глубина и отставание очереди - в экспозиции Prometheus."""
+        enqueue('tests.record', 1)
+        Task.objects.update(run_after=timezone.now() - timedelta(minutes=1))
+        stats = queue_stats()
+        depth, lag, dead = stats['tests.record']
+        self.assertEqual((depth, dead), (1, 0))
+        self.assertGreaterEqual(lag, 60)
+        text = render_queue_metrics(stats)
+        self.assertIn('# TYPE yatube_task_queue_depth gauge', text)
+        self.assertIn('yatube_task_queue_depth{task="tests.record"} 1', text)
+        self.assertIn('yatube_task_queue_dead{task="tests.record"} 0', text)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Post, User
+
+
+class InlineIncludeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        for number in range(3):
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, source):
+        context = Context({'posts': Post.objects.select_related('author')})
+        return Template(source).render(context)
+
+    def test_same_output_as_include(self):
+        """Встроенный шаблон даёт тот же HTML, что и {% include %}."""
+        loop = ('{% load inline_include %}{% for post in posts %}'
+                '{% TAG \'includes/post_text.html\' %}{% endfor %}')
+        included = self.render(loop.replace('TAG', 'include'))
+        cache.clear()
+        inlined = self.render(loop.replace('TAG', 'inline_include'))
+        self.assertEqual(inlined, included)
+        self.assertIn('Пост 2', inlined)
+
+    def test_requires_constant_name(self):
+        """Имя шаблона должно быть константой: встраивание - при компиляции."""
+        for source in ('{% inline_include name %}',
+                       '{% inline_include "a.html" with x=1 %}'):
+            with self.subTest(source=source):
+                with self.assertRaises(TemplateSyntaxError):
+                    Template('{% load inline_include %}' + source)
+
+
+@override_settings(CORE_TEMPLATE_PROFILING=True)
+class TemplateProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_lists_templates(self):
+        """Server-Timing называет страницу, базовый шаблон и подключения."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('posts/index.html', 'base.html', 'includes/header.html',
+                     'inline:includes/post_text.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, timing)
+
+    @override_settings(CORE_TEMPLATE_PROFILING=False)
+    def test_no_header_without_profiling(self):
+        """Без настройки рендеринг не подменяется, заголовка нет."""
+        self.assertIs(Template._render, profiling._original_render)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,32 @@
+"""Хранилище ключей sorl-thumbnail в кэше вместо таблицы thumbnail_kvstore.
+
+В ключах - имена и размеры исходных картинок и миниатюр. Потерянный
+ключ стоит одного чтения файла при следующей генерации, поэтому база
+им не нужна, а чтения идут через память процесса (core.cache).
+"""
+from django.core.cache import caches
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+from . import cache as two_tier
+
+
+class KVStore(KVStoreBase):
+    @property
+    def cache(self):
+        return caches[settings.THUMBNAIL_CACHE]
+
+    def _get_raw(self, key):
+        return two_tier.get(self.cache, key)
+
+    def _set_raw(self, key, value):
+        two_tier.set(self.cache, key, value, None)
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            two_tier.delete(self.cache, key)
+
+    def _find_keys_raw(self, prefix):
+        # Кэш не перечисляет ключи: manage.py thumbnail cleanup и clear
+        # с этим хранилищем ничего не находят.
+        return []
@@ -0,0 +1,17 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+
+from .metrics import collect, registry, render_prometheus
+from .tasks import queue_stats, render_queue_metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@staff_member_required
+def metrics(request):
+    # Свой снимок выкладываем сразу, остальные процессы - по интервалу.
+    registry.publish()
+    return HttpResponse(
+        render_prometheus(collect()) + render_queue_metrics(queue_stats()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -1,15 +1,159 @@
+from functools import partial
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms.models import BaseModelFormSet
 
+from .feeds import INDEX_FEED, estimate_table_count
 from .models import Group, Post
+from .paginators import (CURSOR_PARAM, CachedCountPaginator, CursorPaginator,
+                         QueryCachedCountPaginator)
+from .search import search_posts
+
+
+class KnownLabelAutocomplete(AutocompleteSelect):
+    """Autocomplete, которому подпись выбранного значения дают заранее.
+
+    Обычный AutocompleteSelect за подписью выбранной группы ходит в базу
+    из каждой строки changelist; здесь её берут из select_related.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(item) for item in value
+            if str(item) not in self.choices.field.empty_values
+        ]
+        if self.labels is None or not set(selected) <= set(self.labels):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for key in selected:
+            options.append(self.create_option(
+                name, key, self.labels[key], True, len(options)
+            ))
+        return [(None, options, 0)]
+
+
+class PostChangeListFormSet(BaseModelFormSet):
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for name, field in form.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, KnownLabelAutocomplete):
+                related = getattr(form.instance, name)
+                widget.labels = {} if related is None else {
+                    str(related.pk): field.label_from_instance(related)
+                }
+        return form
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist, который в порядке по умолчанию листается по
+    (pub_date, id) через ?cursor=, а не OFFSET: глубокие страницы
+    стоят столько же, сколько первая. При сортировке по колонке или
+    переходе по ?p= работает обычная пагинация.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_PARAM, None)
+        return lookup_params
+
+    def get_results(self, request):
+        self.keyset_page = None
+        if ORDER_VAR in self.params or self.page_num or self.show_all:
+            super().get_results(request)
+        else:
+            self.get_keyset_results(request)
+        # Ссылки фильтров, сортировки и поиска начинают с первой страницы.
+        self.params.pop(CURSOR_PARAM, None)
+
+    def get_keyset_results(self, request):
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        self.result_count = self.paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.can_show_all = False
+        # Ключи страницы - по индексу (pub_date, id), строки - по pk.
+        page = CursorPaginator(
+            self.queryset.select_related(None).only('pk', 'pub_date'),
+            self.list_per_page,
+        ).get_page(request.GET.get(CURSOR_PARAM))
+        self.result_list = self.queryset.filter(
+            pk__in=[post.pk for post in page]
+        ).order_by('-pub_date', '-id')
+        self.multi_page = page.has_other_pages()
+        self.keyset_page = page
+        self.next_url = page.has_next() and self.get_query_string(
+            {CURSOR_PARAM: page.next_cursor}
+        )
+        self.previous_url = page.has_previous() and self.get_query_string(
+            {CURSOR_PARAM: page.previous_cursor}
+        )
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
+    # Фильтры по дате - диапазоны pub_date по индексу post_pub_date_idx.
+    # date_hierarchy не нужен: его список дат - DISTINCT по всей таблице.
     list_filter = ('pub_date',)
+    ordering = ('-pub_date', '-id')
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо LIKE '%...%' по всей таблице.
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term, ranked=False), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', KnownLabelAutocomplete(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            ))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', PostChangeListFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        # Вся таблица - это главная лента: её размер держат сигналы.
+        if not queryset.query.has_filters():
+            return CachedCountPaginator(
+                queryset, per_page, INDEX_FEED,
+                estimate=partial(estimate_table_count, Post),
+                orphans=orphans,
+                allow_empty_first_page=allow_empty_first_page,
+            )
+        return QueryCachedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page
+        )
+
 
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
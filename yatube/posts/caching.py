@@ -0,0 +1,232 @@
+"""Кэш отрисованных страниц лент и условные GET-запросы.
+
+Страница хранится по пути и номеру страницы в «поколении» пути. Новый
+или удалённый пост сдвигает все страницы ленты - тогда у пути
+меняется поколение. Правка поста на месте задевает одну страницу в
+каждой ленте, её и удаляем.
+
+Путь в ключах - в виде reverse(), с %-кодированием не-ASCII символов,
+и хешируется: ключ годится для memcached при любых username и slug.
+"""
+import hashlib
+import time
+from calendar import timegm
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.encoding import escape_uri_path
+from django.utils.http import http_date, quote_etag
+
+from .cons import FEED_CDN_MAX_AGE, FEED_PAGE_TIMEOUT, NUMBER_OF_POSTS
+from .models import Group, Post, User
+
+PAGE_PARAM = 'page'
+
+
+def path_hash(path):
+    return hashlib.md5(path.encode()).hexdigest()
+
+
+def generation_key(path):
+    return f'posts:page_generation:{path_hash(path)}'
+
+
+def page_key(path, generation, page):
+    return f'posts:page:{path_hash(path)}:{generation}:{page}'
+
+
+def get_generation(path):
+    key = generation_key(path)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def cacheable_page(request):
+    """Номер страницы для ключа или None, если запрос не кэшируем."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if set(request.GET) - {PAGE_PARAM}:
+        return None
+    if request.user.is_authenticated:
+        return None
+    try:
+        page = int(request.GET.get(PAGE_PARAM, 1))
+    except ValueError:
+        page = 1
+    return str(max(page, 1))
+
+
+def store_streamed(key, chunks, content_type):
+    """Отдаёт куски потокового ответа и кладёт страницу в кэш, когда
+    она дошла до клиента целиком."""
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    cache.set(key, (b''.join(content), content_type), FEED_PAGE_TIMEOUT)
+
+
+def cache_anonymous_page(view):
+    """Отдаёт анонимам готовый HTML ленты без обращения к БД."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        page = cacheable_page(request)
+        if page is None:
+            return view(request, *args, **kwargs)
+        # request.path раскодирован, а reverse() при сбросе - нет.
+        path = escape_uri_path(request.path)
+        key = page_key(path, get_generation(path), page)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                if response.streaming:
+                    response.streaming_content = store_streamed(
+                        key, response.streaming_content,
+                        response['Content-Type'],
+                    )
+                else:
+                    cache.set(
+                        key,
+                        (response.content, response['Content-Type']),
+                        FEED_PAGE_TIMEOUT,
+                    )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
+
+
+def group_path(slug):
+    """Путь ленты группы или None, если slug не годится для URL."""
+    try:
+        return reverse('posts:group_list', kwargs={'slug': slug})
+    except NoReverseMatch:
+        return None
+
+
+def feed_pages(author_id, group_id):
+    """Пути лент поста и querysets, по которым считается его страница."""
+    pages = [(reverse('posts:index'), Post.objects.all())]
+    username = User.objects.filter(pk=author_id).values_list(
+        'username', flat=True
+    ).first()
+    if username is not None:
+        pages.append((
+            reverse('posts:profile', kwargs={'username': username}),
+            Post.objects.filter(author_id=author_id),
+        ))
+    if group_id is not None:
+        slug = Group.objects.filter(pk=group_id).values_list(
+            'slug', flat=True
+        ).first()
+        path = group_path(slug) if slug is not None else None
+        if path is not None:
+            pages.append((path, Post.objects.filter(group_id=group_id)))
+    return pages
+
+
+def invalidate_paths(paths):
+    generation = time.time_ns()
+    cache.set_many({generation_key(path): generation for path in paths}, None)
+
+
+def invalidate_feeds(author_id, group_id):
+    """Пост появился в лентах или исчез из них: сбрасываем все страницы."""
+    invalidate_paths(path for path, _ in feed_pages(author_id, group_id))
+
+
+def invalidate_group(*slugs):
+    """Группа переименована: сбрасываем главную и страницы группы."""
+    paths = [group_path(slug) for slug in slugs if slug]
+    invalidate_paths([reverse('posts:index')] + [
+        path for path in paths if path is not None
+    ])
+
+
+def invalidate_user(author_id, group_ids, old_username=None):
+    """Автор сменил имя: сбрасываем ленты, где видны его посты."""
+    paths = [path for path, _ in feed_pages(author_id, None)]
+    paths += [
+        group_path(slug)
+        for slug in Group.objects.filter(pk__in=group_ids).values_list(
+            'slug', flat=True
+        )
+    ]
+    if old_username:
+        paths.append(
+            reverse('posts:profile', kwargs={'username': old_username})
+        )
+    invalidate_paths([path for path in paths if path is not None])
+
+
+def invalidate_post_page(post):
+    """Пост изменился на месте: сбрасываем только его страницу в лентах."""
+    newer = Q(pub_date__gt=post.pub_date) | Q(
+        pub_date=post.pub_date, id__gt=post.pk
+    )
+    for path, queryset in feed_pages(post.author_id, post.group_id):
+        page = queryset.filter(newer).count() // NUMBER_OF_POSTS + 1
+        cache.delete(page_key(path, get_generation(path), page))
+
+
+def make_etag(request, modified, version):
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    raw = f'{modified.timestamp()}:{version}:{user_id}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def conditional_page(get_state):
+    """ETag/Last-Modified и 304 без рендеринга шаблонов.
+
+    get_state(*args, **kwargs) получает аргументы URL и возвращает
+    (время изменения, версию) содержимого страницы или None, если
+    страницы нет - тогда решает само представление.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            state = get_state(*args, **kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+            modified, version = state
+            etag = quote_etag(make_etag(request, modified, version))
+            anonymous = not request.user.is_authenticated
+            # Last-Modified не знает о пользователе - только для анонимов.
+            last_modified = (
+                timegm(modified.utctimetuple()) if anonymous else None
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.setdefault('ETag', etag)
+                if last_modified is not None:
+                    response.setdefault('Last-Modified', http_date(
+                        last_modified
+                    ))
+                if anonymous and not response.cookies:
+                    patch_cache_control(
+                        response, public=True, max_age=0,
+                        s_maxage=FEED_CDN_MAX_AGE, must_revalidate=True,
+                    )
+                else:
+                    patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -1 +1,21 @@
 LIMIT_CHAR = 15
+NUMBER_OF_POSTS = 10
+FEED_COUNT_TIMEOUT = 60 * 60
+FEED_PAGE_TIMEOUT = 5 * 60
+TIMELINE_SIZE = 1000
+TIMELINE_TIMEOUT = 24 * 60 * 60
+FEED_MODIFIED_TIMEOUT = 24 * 60 * 60
+FEED_CDN_MAX_AGE = 30
+PAGE_RANGE_ON_EACH_SIDE = 3
+PAGE_RANGE_ON_ENDS = 1
+GROUP_ACTIVITY_DAYS = 7
+GROUP_STATS_MAX_AGE = 15 * 60
+ADMIN_COUNT_TIMEOUT = 60
+# Сколько строк потоковая лента берёт у курсора за раз
+STREAM_CHUNK_SIZE = 5
+# Миниатюры картинок в лентах: размер -> (геометрия sorl, параметры)
+FEED_THUMBNAILS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+    'feed_2x': ('1920x678', {'crop': 'center', 'upscale': True}),
+}
+PLACEHOLDER_IMAGE = 'img/placeholder.svg'
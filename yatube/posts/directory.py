@@ -0,0 +1,36 @@
+"""Каталог групп: статистика из GroupStats вместо GROUP BY по постам.
+
+Страница читает только группы и их строки статистики - два запроса,
+сколько бы ни было постов. Пересчёт ставится в очередь core.tasks не
+чаще раза в GROUP_STATS_MAX_AGE секунд: отметка в общем кэше
+(cache.add) срабатывает у одного запроса на весь этот срок. Запрос
+сам никогда не пересчитывает: задача фоновая и при любом
+CORE_TASKS_ASYNC ждёт manage.py run_tasks, а cron с manage.py
+rebuild_group_stats подстраховывает. До первого пересчёта каталог
+показывает нули.
+"""
+from django.core.cache import cache
+from django.db.models import F
+
+from core.tasks import enqueue
+
+from .cons import GROUP_STATS_MAX_AGE
+from .models import Group
+from .tasks import REFRESH_GROUP_STATS
+
+REFRESH_KEY = 'posts:group_stats:refresh'
+
+
+def group_directory():
+    """Группы по названию с полями статистики (None - ещё не посчитана)."""
+    return Group.objects.annotate(
+        posts_count=F('stats__posts_count'),
+        last_post_date=F('stats__last_post_date'),
+        recent_posts_count=F('stats__recent_posts_count'),
+        refreshed=F('stats__refreshed'),
+    ).order_by('title', 'pk')
+
+
+def schedule_refresh():
+    if cache.add(REFRESH_KEY, True, GROUP_STATS_MAX_AGE):
+        enqueue(REFRESH_GROUP_STATS, None)
@@ -0,0 +1,104 @@
+"""Потоковая выгрузка постов в JSON Lines или CSV.
+
+Посты читаются keyset-страницами по (pub_date, id), каждая страница -
+через .iterator(), поэтому в памяти не бывает больше chunk_size строк,
+а долгая выгрузка не держит одну транзакцию открытой.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+CHUNK_SIZE = 2000
+# wbits=31: zlib пишет заголовок и хвост формата gzip.
+GZIP_WBITS = 31
+
+
+def parse_since(value):
+    """Дата или дата со временем из --since / ?since=."""
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'неверная дата {value!r}')
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def iter_posts(since=None, chunk_size=CHUNK_SIZE):
+    """Кортежи FIELDS по возрастанию (pub_date, id)."""
+    queryset = Post.objects.order_by('pub_date', 'id').values_list(
+        'id', 'text', 'pub_date', 'author__username', 'group__slug'
+    )
+    if since is not None:
+        queryset = queryset.filter(pub_date__gte=since)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(
+                Q(pub_date__gt=last[2]) | Q(pub_date=last[2], id__gt=last[0])
+            )
+        rows = 0
+        for row in page[:chunk_size].iterator(chunk_size=chunk_size):
+            rows += 1
+            last = row
+            yield row
+        if rows < chunk_size:
+            return
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку как есть."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for post_id, text, pub_date, author, group in rows:
+        yield writer.writerow(
+            (post_id, text, pub_date.isoformat(), author, group or '')
+        )
+
+
+def export_lines(file_format, since=None, chunk_size=CHUNK_SIZE):
+    rows = iter_posts(since, chunk_size)
+    return csv_lines(rows) if file_format == 'csv' else jsonl_lines(rows)
+
+
+def encode(lines, compress=False):
+    """Строки в байты, при compress=True - сразу в поток gzip."""
+    if not compress:
+        for line in lines:
+            yield line.encode()
+        return
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for line in lines:
+        chunk = compressor.compress(line.encode())
+        if chunk:
+            yield chunk
+    yield compressor.flush()
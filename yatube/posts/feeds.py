@@ -0,0 +1,126 @@
+"""Ключи лент постов и кэш их размеров.
+
+Лента - главная страница, страница группы или профиль автора. Ключ
+ленты используется как часть ключей кэша, поэтому всё, что кэширует
+ленты, берёт его отсюда.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .cons import FEED_COUNT_TIMEOUT, FEED_MODIFIED_TIMEOUT
+
+INDEX_FEED = 'index'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def post_feeds(author_id, group_id):
+    """Ленты, в которые попадает пост с таким автором и группой."""
+    feeds = [INDEX_FEED, author_feed(author_id)]
+    if group_id is not None:
+        feeds.append(group_feed(group_id))
+    return feeds
+
+
+def count_cache_key(feed):
+    return f'posts:feed_count:{feed}'
+
+
+def get_cached_count(feed):
+    return cache.get(count_cache_key(feed))
+
+
+def set_cached_count(feed, count):
+    cache.add(count_cache_key(feed), count, FEED_COUNT_TIMEOUT)
+
+
+def change_cached_count(feed, delta):
+    """Сдвигает закэшированный размер ленты; холодный кэш не трогаем."""
+    try:
+        cache.incr(count_cache_key(feed), delta)
+    except ValueError:
+        pass
+
+
+def modified_cache_key(feed):
+    return f'posts:feed_modified:{feed}'
+
+
+def touch_feeds(feeds):
+    """Отмечает, что содержимое лент изменилось сейчас."""
+    now = timezone.now()
+    cache.set_many(
+        {modified_cache_key(feed): now for feed in feeds},
+        FEED_MODIFIED_TIMEOUT,
+    )
+
+
+def feed_state(feed):
+    """(время последнего изменения, ключ ленты) для валидаторов HTTP.
+
+    Размер ленты в валидатор не входит: любое его изменение и так
+    сдвигает время изменения через touch_feeds.
+
+    Холодный кэш считаем изменением «сейчас»: клиент получит полный
+    ответ лишний раз, но никогда не получит устаревший.
+    """
+    key = modified_cache_key(feed)
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, timezone.now(), FEED_MODIFIED_TIMEOUT)
+        modified = cache.get(key)
+    return modified, feed
+
+
+def id_cache_key(model, field, value):
+    # slug и username из URL бывают не-ASCII: ключ хешируем.
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'posts:id:{model._meta.label_lower}:{field}:{digest}'
+
+
+def lookup_id(model, field, value):
+    """id объекта по уникальному полю из URL (slug, username).
+
+    Хранится в кэше, чтобы проверка валидаторов не стоила запроса к БД.
+    Сбрасывает forget_id при переименовании или удалении.
+    """
+    key = id_cache_key(model, field, value)
+    pk = cache.get(key)
+    if pk is None:
+        pk = model.objects.filter(
+            **{field: value}
+        ).values_list('pk', flat=True).first()
+        if pk is not None:
+            cache.set(key, pk, FEED_MODIFIED_TIMEOUT)
+    return pk
+
+
+def forget_id(model, field, *values):
+    cache.delete_many([id_cache_key(model, field, value) for value in values])
+
+
+def estimate_table_count(model):
+    """Оценка числа строк по статистике PostgreSQL без COUNT(*).
+
+    На других СУБД дешёвой оценки нет - возвращает None.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
@@ -6,12 +6,14 @@ from .models import Post
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
         labels = {
             "text": "Текст",
-            "group": "Группа"
+            "group": "Группа",
+            "image": "Картинка"
         }
         help_texts = {
             "text": "введите текст поста",
-            "group": "выберите группу, к которой относится ваш пост"
+            "group": "выберите группу, к которой относится ваш пост",
+            "image": "загрузите картинку к посту"
         }
@@ -0,0 +1,254 @@
+"""Массовый импорт постов из JSON Lines или CSV.
+
+Строка входа: text, author (username), group (slug, необязательно),
+pub_date (ISO 8601, необязательно). Недостающие авторы и группы
+создаются. Посты пишутся bulk_create мимо сигналов posts.signals,
+поэтому после импорта производные данные пересобираются для
+затронутых лент разом.
+"""
+import csv
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import bulk_batch_size
+
+from . import search
+from .caching import group_path, invalidate_paths
+from .feeds import (INDEX_FEED, author_feed, count_cache_key, group_feed,
+                    touch_feeds)
+from .models import AuthorStats, Group, Post, User, keep_pub_date
+from .timelines import timeline_key
+
+FORMATS = ('jsonl', 'csv')
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+@contextmanager
+def manual_pub_date():
+    """В этом блоке bulk_create сохраняет заданный pub_date."""
+    token = keep_pub_date.set(True)
+    try:
+        yield
+    finally:
+        keep_pub_date.reset(token)
+
+
+def read_rows(file, file_format):
+    """Построчно отдаёт строки из текстового потока, не читая его целиком.
+
+    CSV - словарями, JSON Lines - исходным текстом строки: его разбирает
+    clean_row, чтобы битая строка пропускалась, а не обрывала импорт.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def parse_row(row):
+    if not isinstance(row, str):
+        return row
+    try:
+        row = json.loads(row)
+    except ValueError as error:
+        raise ImportRowError(f'неверный JSON: {error}')
+    if not isinstance(row, dict):
+        raise ImportRowError('строка должна быть объектом JSON')
+    return row
+
+
+def text_field(row, name):
+    value = row.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ImportRowError(f'{name} должно быть строкой')
+    return value.strip()
+
+
+def parse_pub_date(value):
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError:
+        pub_date = None
+    if pub_date is None:
+        raise ImportRowError(f'неверная дата {value!r}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def clean_row(row):
+    row = parse_row(row)
+    text = text_field(row, 'text')
+    author = text_field(row, 'author')
+    if not text or not author:
+        raise ImportRowError('нужны text и author')
+    pub_date = text_field(row, 'pub_date')
+    return {
+        'text': text,
+        'author': author,
+        'group': text_field(row, 'group') or None,
+        'pub_date': (
+            parse_pub_date(pub_date) if pub_date else timezone.now()
+        ),
+    }
+
+
+class IdCache:
+    """username/slug -> id: один запрос на пачку только для новых имён."""
+
+    def __init__(self, model, field, make):
+        self.model = model
+        self.field = field
+        self.make = make
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = set(names) - self.ids.keys()
+        if not missing:
+            return
+        found = self.model.objects.filter(
+            **{f'{self.field}__in': missing}
+        ).values_list(self.field, 'pk')
+        self.ids.update(found)
+        new = missing - self.ids.keys()
+        if new:
+            self.model.objects.bulk_create(self.make(name) for name in new)
+            self.ids.update(self.model.objects.filter(
+                **{f'{self.field}__in': new}
+            ).values_list(self.field, 'pk'))
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+class PostImporter:
+    """Пишет посты пачками; каждые chunk_size строк - одна транзакция."""
+
+    def __init__(self, batch_size=1000, chunk_size=10000):
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.authors = IdCache(
+            User, 'username',
+            lambda username: User(username=username, password='!'),
+        )
+        self.groups = IdCache(
+            Group, 'slug', lambda slug: Group(title=slug, slug=slug),
+        )
+        self.author_ids = set()
+        self.group_ids = set()
+
+    def import_chunk(self, rows):
+        self.authors.resolve(row['author'] for row in rows)
+        self.groups.resolve(row['group'] for row in rows if row['group'])
+        posts = []
+        for row in rows:
+            author_id = self.authors[row['author']]
+            group_id = self.groups[row['group']] if row['group'] else None
+            self.author_ids.add(author_id)
+            if group_id is not None:
+                self.group_ids.add(group_id)
+            posts.append(Post(
+                text=row['text'],
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=row['pub_date'],
+            ))
+        last_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        with manual_pub_date():
+            Post.objects.bulk_create(
+                posts, batch_size=bulk_batch_size(Post, self.batch_size)
+            )
+        # SQLite не возвращает id из bulk_create: новые посты - те, что
+        # после last_id. Индекс пишется в той же транзакции.
+        search.index_posts_after(last_id)
+
+    def run(self, rows, skip=0, on_chunk=None, on_error=None):
+        """Импортирует rows, пропустив первые skip (уже загруженные).
+
+        on_chunk(обработано_строк, записано_постов) вызывается после
+        фиксации каждой транзакции - там и пишут точку возобновления.
+        on_error(номер_строки, ошибка) - для строк, которые пропущены.
+        """
+        processed = skip
+        imported = 0
+        rows = islice(rows, skip, None)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            cleaned = []
+            for number, row in enumerate(chunk, processed + 1):
+                try:
+                    cleaned.append(clean_row(row))
+                except ImportRowError as error:
+                    if on_error is not None:
+                        on_error(number, error)
+            with transaction.atomic():
+                self.import_chunk(cleaned)
+            processed += len(chunk)
+            imported += len(cleaned)
+            if on_chunk is not None:
+                on_chunk(processed, imported)
+        return imported
+
+    def refresh_derived(self):
+        """Статистика авторов и кэш лент после bulk_create."""
+        AuthorStats.rebuild(author_ids=self.author_ids)
+        feeds = [INDEX_FEED]
+        feeds += [author_feed(pk) for pk in self.author_ids]
+        feeds += [group_feed(pk) for pk in self.group_ids]
+        cache.delete_many(
+            [count_cache_key(feed) for feed in feeds]
+            + [timeline_key(feed) for feed in feeds]
+        )
+        touch_feeds(feeds)
+        usernames = {pk: name for name, pk in self.authors.ids.items()}
+        slugs = {pk: slug for slug, pk in self.groups.ids.items()}
+        paths = [reverse('posts:index')]
+        paths += [
+            reverse('posts:profile', kwargs={'username': usernames[pk]})
+            for pk in self.author_ids
+        ]
+        paths += [group_path(slugs[pk]) for pk in self.group_ids]
+        invalidate_paths(path for path in paths if path is not None)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return int(file.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, processed):
+    """Атомарно: при падении в файле остаётся прошлое значение."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        file.write(str(processed))
+    os.replace(tmp, path)
+
+
+def open_input(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    return open(path, encoding='utf-8', newline='')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import (CHUNK_SIZE, FORMATS, encode, export_lines,
+                             parse_since)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты (с username автора и slug группы) в JSON Lines '
+            'или CSV, не загружая таблицу в память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default='-', help='файл или - для stdout',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--since',
+            help='Только посты с pub_date не раньше этой даты (ISO 8601).',
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['since']) if options['since'] else None
+        except ValueError as error:
+            raise CommandError(error)
+        chunks = encode(
+            export_lines(options['format'], since, options['chunk_size']),
+            options['gzip'],
+        )
+        if options['output'] == '-':
+            self.write_stdout(chunks, options['gzip'])
+            return
+        with open(options['output'], 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+    def write_stdout(self, chunks, compressed):
+        """Байты - в буфер stdout, если он есть (консоль, pipe).
+
+        call_command(stdout=StringIO()) буфера не даёт: туда пишем текст.
+        Строки не режутся между кусками, поэтому кусок декодируется сам.
+        """
+        buffer = getattr(self.stdout, 'buffer', None)
+        if buffer is not None:
+            for chunk in chunks:
+                buffer.write(chunk)
+            buffer.flush()
+            return
+        if compressed:
+            raise CommandError('--gzip в текстовый stdout: укажите --output')
+        for chunk in chunks:
+            self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import (FORMATS, PostImporter, open_input,
+                             read_checkpoint, read_rows, write_checkpoint)
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из JSON Lines или CSV (поля text, author, '
+            'group, pub_date), создавая недостающих авторов и группы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл или - для stdin')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с числом загруженных строк: повторный запуск '
+                 'продолжит с места остановки.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'csv' if path.endswith('.csv') else 'jsonl'
+        checkpoint = options['checkpoint']
+        skip = read_checkpoint(checkpoint) if checkpoint else 0
+        if skip:
+            self.stdout.write(f'Продолжаем после строки {skip}')
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+        )
+        start = time.monotonic()
+
+        def on_chunk(processed, imported):
+            if checkpoint:
+                write_checkpoint(checkpoint, processed)
+            elapsed = time.monotonic() - start
+            self.stdout.write(
+                f'Строк: {processed}, постов: {imported}, '
+                f'{imported / max(elapsed, 1e-9):.0f} строк/с'
+            )
+
+        def on_error(number, error):
+            self.stderr.write(f'Строка {number} пропущена: {error}')
+
+        try:
+            with open_input(path) as file:
+                imported = importer.run(
+                    read_rows(file, file_format), skip=skip,
+                    on_chunk=on_chunk, on_error=on_error,
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        finally:
+            importer.refresh_derived()
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {imported} постов за {elapsed:.1f} с '
+            f'({imported / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает AuthorStats (число и дату последнего поста).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'authors', nargs='*', type=int, metavar='author_id',
+            help='id авторов; по умолчанию - все пользователи',
+        )
+
+    def handle(self, *args, **options):
+        author_ids = options['authors'] or None
+        AuthorStats.rebuild(author_ids=author_ids)
+        queryset = AuthorStats.objects.all()
+        if author_ids:
+            queryset = queryset.filter(author_id__in=author_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика пересчитана для {queryset.count()} авторов'
+        ))
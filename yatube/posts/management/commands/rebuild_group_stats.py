@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import GroupStats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает GroupStats для каталога групп (число постов, '
+            'дату последнего и активность за последние дни).')
+
+    def handle(self, *args, **options):
+        GroupStats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика пересчитана для {GroupStats.objects.count()} групп'
+        ))
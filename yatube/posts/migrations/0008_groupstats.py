@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Время последнего поста')),
+                ('recent_posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов за последние дни')),
+                ('refreshed', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время пересчёта')),
+            ],
+            options={
+                'verbose_name': 'статистика группы',
+                'verbose_name_plural': 'статистика групп',
+            },
+        ),
+    ]
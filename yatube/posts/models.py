@@ -1,11 +1,21 @@
+from contextvars import ContextVar
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from core.db import bulk_batch_size
 
-from .cons import LIMIT_CHAR
+from .cons import GROUP_ACTIVITY_DAYS, LIMIT_CHAR
 
 
 User = get_user_model()
 
+# Внутри posts.importing.manual_pub_date новые посты сохраняют pub_date.
+keep_pub_date = ContextVar('keep_pub_date', default=False)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name="Название группы")
@@ -26,6 +36,9 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Время публикации")
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время изменения")
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -40,11 +53,217 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         verbose_name="Имя группы"
     )
+    image = models.ImageField(
+        upload_to='posts/',
+        blank=True,
+        verbose_name="Картинка"
+    )
+    # JSON от posts.thumbnails: готовые миниатюры image, пусто - их нет.
+    thumbnails = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name="Миниатюры картинки"
+    )
 
     def __str__(self):
         return self.text[:LIMIT_CHAR]
 
+    def save(self, *args, **kwargs):
+        # Счётчики из posts.signals обновляются в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date_idx'),
+        )
         verbose_name = "пост"
         verbose_name_plural = "посты"
+
+
+def allow_manual_pub_date(field):
+    """auto_now_add поля, который в keep_pub_date не трогает заданную дату.
+
+    Флаг в ContextVar, а не в самом поле: импорт в одном потоке не
+    меняет даты постов, которые в это время создают другие. Класс поля
+    остаётся DateTimeField - схема и миграции не меняются.
+    """
+    auto_pre_save = field.pre_save
+
+    def pre_save(model_instance, add):
+        value = getattr(model_instance, field.attname)
+        if add and value is not None and keep_pub_date.get():
+            return value
+        return auto_pre_save(model_instance, add)
+
+    field.pre_save = pre_save
+
+
+allow_manual_pub_date(Post._meta.get_field('pub_date'))
+
+
+class AuthorStats(models.Model):
+    """Предрасчитанная статистика автора вместо COUNT(*) по его постам.
+
+    Поддерживается сигналами из posts.signals, пересобирается командой
+    rebuild_author_stats.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name="Автор"
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Число постов")
+    last_post_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Время последнего поста")
+
+    class Meta:
+        verbose_name = "статистика автора"
+        verbose_name_plural = "статистика авторов"
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+    @classmethod
+    def rebuild(cls, author_ids=None):
+        """Пересчитывает статистику по таблице постов.
+
+        Без author_ids - для всех пользователей, включая тех, у кого
+        постов нет: отсутствие строки значит «ещё не посчитано».
+        Строку, которую между удалением и вставкой успел записать
+        параллельный пересчёт, вставка пропускает (ignore_conflicts):
+        два первых чтения профиля не дают IntegrityError.
+        """
+        users = User.objects.order_by('pk')
+        posts = Post.objects.order_by()
+        if author_ids is not None:
+            users = users.filter(pk__in=author_ids)
+            posts = posts.filter(author_id__in=author_ids)
+        totals = {
+            row['author_id']: row
+            for row in posts.values('author_id').annotate(
+                posts_count=Count('id'), last_post_date=Max('pub_date')
+            )
+        }
+        with transaction.atomic():
+            cls.objects.filter(author__in=users).delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        author_id=pk,
+                        posts_count=totals.get(pk, {}).get('posts_count', 0),
+                        last_post_date=totals.get(pk, {}).get(
+                            'last_post_date'
+                        ),
+                    )
+                    for pk in users.values_list('pk', flat=True)
+                ),
+                batch_size=bulk_batch_size(cls, 1000),
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def for_author(cls, author):
+        """Статистика автора; при отсутствии строки считает её один раз."""
+        try:
+            return author.post_stats
+        except cls.DoesNotExist:
+            cls.rebuild(author_ids=[author.pk])
+            return cls.objects.get(author=author)
+
+
+class GroupStats(models.Model):
+    """Статистика группы для каталога posts:groups.
+
+    Окно «за последние дни» сдвигается со временем, поэтому строки не
+    обновляются сигналами, а пересчитываются целиком: задачей из
+    posts.directory или командой rebuild_group_stats по расписанию.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name="Группа"
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Число постов")
+    last_post_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Время последнего поста")
+    recent_posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Постов за последние дни")
+    refreshed = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Время пересчёта")
+
+    class Meta:
+        verbose_name = "статистика группы"
+        verbose_name_plural = "статистика групп"
+
+    def __str__(self):
+        return f'{self.group}: {self.posts_count}'
+
+    @classmethod
+    def rebuild(cls):
+        """Один GROUP BY по постам; строки обновляются на месте.
+
+        Каталог во время пересчёта читает прежние цифры, а не пустую
+        таблицу. Строки новых групп добавляются с ignore_conflicts:
+        параллельный пересчёт не падает на уже вставленной строке.
+        """
+        now = timezone.now()
+        since = now - timedelta(days=GROUP_ACTIVITY_DAYS)
+        totals = {
+            row['group_id']: row
+            for row in Post.objects.order_by().filter(
+                group__isnull=False
+            ).values('group_id').annotate(
+                posts_count=Count('id'),
+                last_post_date=Max('pub_date'),
+                recent_posts_count=Count('id', filter=Q(pub_date__gte=since)),
+            )
+        }
+        empty = {'posts_count': 0, 'recent_posts_count': 0}
+        rows = [
+            cls(
+                group_id=pk,
+                posts_count=totals.get(pk, empty)['posts_count'],
+                last_post_date=totals.get(pk, {}).get('last_post_date'),
+                recent_posts_count=totals.get(pk, empty)[
+                    'recent_posts_count'
+                ],
+                refreshed=now,
+            )
+            for pk in Group.objects.order_by('pk').values_list(
+                'pk', flat=True
+            )
+        ]
+        with transaction.atomic():
+            existing = set(cls.objects.values_list('group_id', flat=True))
+            cls.objects.bulk_update(
+                [row for row in rows if row.group_id in existing],
+                ('posts_count', 'last_post_date', 'recent_posts_count',
+                 'refreshed'),
+                batch_size=1000,
+            )
+            cls.objects.bulk_create(
+                [row for row in rows if row.group_id not in existing],
+                batch_size=bulk_batch_size(cls, 1000),
+                ignore_conflicts=True,
+            )
@@ -0,0 +1,242 @@
+import base64
+import binascii
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cons import (ADMIN_COUNT_TIMEOUT, PAGE_RANGE_ON_EACH_SIDE,
+                   PAGE_RANGE_ON_ENDS)
+from .feeds import get_cached_count, set_cached_count
+
+
+CURSOR_PARAM = 'cursor'
+FORWARD = 'n'
+BACKWARD = 'p'
+CURSOR_SALT = 'posts.cursor'
+CURSOR_SEP = '.'
+MAX_PK = 2 ** 63 - 1
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def cursor_signer():
+    return signing.Signer(sep=CURSOR_SEP, salt=CURSOR_SALT)
+
+
+def encode_cursor(post, direction):
+    """Упаковывает позицию поста в подписанный токен для ?cursor=."""
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    value = base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    return cursor_signer().sign(value)
+
+
+def decode_cursor(token):
+    """Возвращает (направление, pub_date, id) из токена.
+
+    Токен без верной подписи, с наивной датой или с позицией, которую
+    не примет БД, - InvalidCursor.
+    """
+    try:
+        value = cursor_signer().unsign(token)
+        padded = value + '=' * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+        if pub_date is not None and timezone.is_aware(pub_date):
+            pub_date.astimezone(timezone.utc)
+    except (signing.BadSignature, binascii.Error, UnicodeError,
+            ValueError, OverflowError):
+        raise InvalidCursor(token)
+    if (direction not in (FORWARD, BACKWARD) or pub_date is None
+            or timezone.is_naive(pub_date) or not 0 < pk <= MAX_PK):
+        raise InvalidCursor(token)
+    return direction, pub_date, pk
+
+
+def elided_page_range(number, num_pages, on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+                      on_ends=PAGE_RANGE_ON_ENDS):
+    """Номера страниц для навигации: первые и последние on_ends и окно
+    on_each_side вокруг текущей, пропуски отмечены None.
+
+    Длина не зависит от размера ленты: 1 None 7 8 9 10 11 12 13 None 5000.
+    """
+    window = range(
+        max(number - on_each_side, 1),
+        min(number + on_each_side, num_pages) + 1,
+    )
+    if num_pages <= 2 * (on_each_side + on_ends) + 1:
+        yield from range(1, num_pages + 1)
+        return
+    if window.start > on_ends + 2:
+        yield from range(1, on_ends + 1)
+        yield None
+    else:
+        yield from range(1, window.start)
+    yield from window
+    if window.stop < num_pages - on_ends:
+        yield None
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(window.stop, num_pages + 1)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт размер ленты из кэша.
+
+    Значение в кэше сдвигают сигналы posts.signals, поэтому COUNT(*)
+    выполняется только на холодном кэше - и то лишь если нет оценки:
+    estimate() может вернуть дешёвое число (или None, если не может).
+    """
+
+    def __init__(self, object_list, per_page, feed, estimate=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        count = get_cached_count(self.feed)
+        if count is None:
+            if self.estimate is not None:
+                count = self.estimate()
+            if count is None:
+                count = self.object_list.count()
+            set_cached_count(self.feed, count)
+        return count
+
+
+class QueryCachedCountPaginator(Paginator):
+    """Paginator, который кэширует COUNT(*) по тексту запроса.
+
+    Для выборок с произвольными фильтрами, которые сигналы не
+    отслеживают: число может отставать на ADMIN_COUNT_TIMEOUT секунд.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        raw = f'{sql}:{params}'.encode()
+        key = f'posts:count:{hashlib.md5(raw).hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, ADMIN_COUNT_TIMEOUT)
+        return count
+
+
+class CursorPage:
+    """Страница ленты без номера и без общего числа страниц."""
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} posts>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id).
+
+    Вместо COUNT(*) и OFFSET каждая страница выбирается условием
+    «строго раньше/позже последнего показанного поста», поэтому время
+    ответа не зависит от глубины страницы.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, cursor):
+        """Как Paginator.get_page: битый токен ведёт на первую страницу."""
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except InvalidCursor:
+            position = None
+        if position is None:
+            return self._first_page()
+        direction, pub_date, pk = position
+        if direction == FORWARD:
+            return self._page_after(pub_date, pk)
+        return self._page_before(pub_date, pk)
+
+    def _fetch(self, queryset, *ordering):
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def _first_page(self):
+        rows = self._fetch(self.queryset, '-pub_date', '-id')
+        return self._forward_page(rows, has_previous=False)
+
+    def _page_after(self, pub_date, pk):
+        queryset = self.queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+        )
+        rows = self._fetch(queryset, '-pub_date', '-id')
+        return self._forward_page(rows, has_previous=True)
+
+    def _page_before(self, pub_date, pk):
+        queryset = self.queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+        )
+        rows = self._fetch(queryset, 'pub_date', 'id')
+        if not rows:
+            return self._first_page()
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=encode_cursor(rows[-1], FORWARD),
+            previous_cursor=(
+                encode_cursor(rows[0], BACKWARD) if has_previous else None
+            ),
+        )
+
+    def _forward_page(self, rows, has_previous):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows:
+            return CursorPage(rows, self)
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=encode_cursor(rows[-1], FORWARD) if has_next else None,
+            previous_cursor=(
+                encode_cursor(rows[0], BACKWARD) if has_previous else None
+            ),
+        )
@@ -0,0 +1,133 @@
+"""Полнотекстовый поиск по Post.text.
+
+SQLite: отдельная таблица FTS5 с копией текста, её обновляют сигналы
+posts.signals. PostgreSQL: GIN-индекс по выражению to_tsvector, его
+поддерживает сама СУБД. На остальных СУБД - icontains без индекса.
+"""
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+
+FTS_TABLE = 'posts_post_fts'
+PG_CONFIG = 'russian'
+PG_INDEX = 'posts_post_text_search_idx'
+# Через сколько дней пост теряет половину веса при ранжировании.
+RECENCY_HALF_LIFE_DAYS = 30
+
+
+def create_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            "text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON posts_post USING GIN '
+            f"(to_tsvector('{PG_CONFIG}'::regconfig, COALESCE(text, '')))"
+        )
+
+
+def drop_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def rebuild_index():
+    """Заново заполняет индекс SQLite из таблицы постов."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+
+
+def index_posts_after(post_id):
+    """Индексирует посты с id больше post_id - вставленные bulk_create."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        # Пост, созданный рядом обычным путём, мог уже попасть в индекс.
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid > %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) '
+            'SELECT id, text FROM posts_post WHERE id > %s',
+            [post_id],
+        )
+
+
+def index_post(post):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(post_id):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def fts_query(text):
+    """Слова запроса как фразы FTS5: операторы пользователя не работают."""
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_posts(queryset, text, ranked=True):
+    """Посты из queryset, где встречаются все слова запроса.
+
+    С ranked=True сортирует по релевантности с поправкой на свежесть.
+    """
+    if connection.vendor == 'sqlite':
+        match = fts_query(text)
+        if not match:
+            return queryset.none()
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = posts_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        )
+        if not ranked:
+            return queryset
+        # bm25 отрицателен: чем меньше, тем лучше; старые посты
+        # подтягиваются к нулю.
+        rank = (
+            f'bm25({FTS_TABLE}) / (1 + (julianday(\'now\') - '
+            f'julianday(posts_post.pub_date)) / {RECENCY_HALF_LIFE_DAYS})'
+        )
+        return queryset.extra(
+            select={'search_rank': rank}, order_by=['search_rank', '-id']
+        )
+    if connection.vendor == 'postgresql':
+        vector = SearchVector('text', config=PG_CONFIG)
+        query = SearchQuery(text, config=PG_CONFIG)
+        queryset = queryset.annotate(search=vector).filter(search=query)
+        if not ranked:
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(vector, query)
+        ).order_by('-search_rank', '-pub_date')
+    return queryset.filter(text__icontains=text)
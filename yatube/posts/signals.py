@@ -0,0 +1,241 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import Case, When
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import timelines
+from .caching import invalidate_feeds, invalidate_group, invalidate_user
+from .feeds import (INDEX_FEED, author_feed, change_cached_count, forget_id,
+                    group_feed, post_feeds, touch_feeds)
+from .models import AuthorStats, Group, Post, User
+from .tasks import REFRESH_PAGES, SEARCH_INDEX, THUMBNAILS
+from .thumbnails import ready_thumbnails
+
+
+@receiver(post_init, sender=Post)
+def remember_loaded_state(sender, instance, **kwargs):
+    """Запоминает автора и группу, с которыми пост был загружен."""
+    # Через __dict__, чтобы не дёргать отложенные (.only/.defer) поля.
+    instance._loaded_author_id = instance.__dict__.get('author_id')
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+def remember_saved_state(instance):
+    instance._loaded_author_id = instance.author_id
+    instance._loaded_group_id = instance.group_id
+
+
+def add_author_post(author_id, pub_date):
+    newer = Q(last_post_date__isnull=True) | Q(last_post_date__lt=pub_date)
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_date=Case(
+            When(newer, then=Value(pub_date, output_field=DateTimeField())),
+            default=F('last_post_date'),
+        ),
+    )
+    if not updated:
+        AuthorStats.rebuild(author_ids=[author_id])
+
+
+def remove_author_post(author_id, pub_date):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if not stats.update(posts_count=F('posts_count') - 1):
+        # Строки нет - её посчитает AuthorStats.for_author при чтении.
+        return
+    # Удалили самый свежий пост - берём дату следующего по индексу.
+    latest = Post.objects.filter(
+        author_id=OuterRef('author_id')
+    ).order_by('-pub_date').values('pub_date')[:1]
+    stats.filter(last_post_date=pub_date).update(
+        last_post_date=Subquery(latest)
+    )
+
+
+def update_author_stats(instance, created):
+    if created:
+        add_author_post(instance.author_id, instance.pub_date)
+    elif instance._loaded_author_id != instance.author_id:
+        if instance._loaded_author_id is not None:
+            remove_author_post(instance._loaded_author_id, instance.pub_date)
+        add_author_post(instance.author_id, instance.pub_date)
+
+
+def after_commit(func, *args):
+    """Кэш трогаем только после коммита: откат его не задевает, а
+    параллельный запрос не закэширует страницу без нового поста."""
+    transaction.on_commit(partial(func, *args))
+
+
+def change_counts_on_commit(changes):
+    """Сдвигает размеры лент после коммита: откат их не трогает."""
+    def apply():
+        for feed, delta in changes:
+            change_cached_count(feed, delta)
+    transaction.on_commit(apply)
+
+
+def update_feed_counts(instance, created):
+    if created:
+        change_counts_on_commit([
+            (feed, 1)
+            for feed in post_feeds(instance.author_id, instance.group_id)
+        ])
+        return
+    changes = []
+    moves = (
+        (author_feed, instance._loaded_author_id, instance.author_id),
+        (group_feed, instance._loaded_group_id, instance.group_id),
+    )
+    for feed, old_id, new_id in moves:
+        if old_id == new_id:
+            continue
+        if old_id is not None:
+            changes.append((feed(old_id), -1))
+        if new_id is not None:
+            changes.append((feed(new_id), 1))
+    change_counts_on_commit(changes)
+
+
+def update_page_cache(instance, created):
+    old_author_id = instance._loaded_author_id
+    old_group_id = instance._loaded_group_id
+    if created:
+        after_commit(invalidate_feeds, instance.author_id, instance.group_id)
+    elif (old_author_id, old_group_id) != (
+        instance.author_id, instance.group_id
+    ):
+        after_commit(invalidate_feeds, old_author_id, old_group_id)
+        after_commit(invalidate_feeds, instance.author_id, instance.group_id)
+    else:
+        # Пост остался в тех же лентах: искать его страницы - отдельные
+        # COUNT по каждой ленте, это может подождать.
+        enqueue(REFRESH_PAGES, instance.pk)
+
+
+def update_timelines(instance, created):
+    moves = (
+        (author_feed, instance._loaded_author_id, instance.author_id),
+        (group_feed, instance._loaded_group_id, instance.group_id),
+    )
+    for feed, old_id, new_id in moves:
+        if not created and old_id == new_id:
+            continue
+        if old_id is not None and not created:
+            after_commit(timelines.remove, feed(old_id), instance.pk)
+        if new_id is not None:
+            after_commit(timelines.push, feed(new_id), instance)
+
+
+def update_modified(instance):
+    feeds = set(post_feeds(instance.author_id, instance.group_id))
+    if instance._loaded_author_id is not None:
+        feeds.update(post_feeds(
+            instance._loaded_author_id, instance._loaded_group_id
+        ))
+    after_commit(touch_feeds, feeds)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, update_fields=None, **kwargs):
+    update_author_stats(instance, created)
+    update_feed_counts(instance, created)
+    update_page_cache(instance, created)
+    update_timelines(instance, created)
+    update_modified(instance)
+    if update_fields is None or 'text' in update_fields:
+        enqueue(SEARCH_INDEX, instance.pk)
+    remember_saved_state(instance)
+    # Задача фоновая: картинка декодируется обработчиком очереди, а
+    # не в запросе, который сохранил пост.
+    if instance.image and ready_thumbnails(instance) is None:
+        enqueue(THUMBNAILS, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    enqueue(SEARCH_INDEX, instance.pk)
+    remove_author_post(instance.author_id, instance.pub_date)
+    change_counts_on_commit([
+        (feed, -1)
+        for feed in post_feeds(instance.author_id, instance.group_id)
+    ])
+    after_commit(invalidate_feeds, instance.author_id, instance.group_id)
+    after_commit(
+        timelines.remove, author_feed(instance.author_id), instance.pk
+    )
+    if instance.group_id is not None:
+        after_commit(
+            timelines.remove, group_feed(instance.group_id), instance.pk
+        )
+    after_commit(
+        touch_feeds, post_feeds(instance.author_id, instance.group_id)
+    )
+
+
+@receiver(post_init, sender=Group)
+def remember_loaded_slug(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    """Название группы выводится в карточках постов ленты."""
+    forget_id(Group, 'slug', instance._loaded_slug, instance.slug)
+    after_commit(invalidate_group, instance._loaded_slug, instance.slug)
+    instance._loaded_slug = instance.slug
+    after_commit(touch_feeds, (INDEX_FEED, group_feed(instance.pk)))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_id(Group, 'slug', instance.slug)
+
+
+def author_renamed(author_id, old_username):
+    """Сбрасывает страницы и валидаторы лент с постами автора."""
+    group_ids = list(Post.objects.filter(author_id=author_id).exclude(
+        group=None
+    ).values_list('group_id', flat=True).distinct())
+    invalidate_user(author_id, group_ids, old_username)
+    # Лента автора входит и в валидаторы страниц его постов.
+    touch_feeds(
+        [INDEX_FEED, author_feed(author_id)]
+        + [group_feed(group_id) for group_id in group_ids]
+    )
+
+
+def shown_name(user):
+    """Поля автора, которые выводятся в карточках его постов."""
+    return tuple(
+        user.__dict__.get(field)
+        for field in ('username', 'first_name', 'last_name')
+    )
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+    instance._loaded_name = shown_name(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if instance._loaded_username != instance.username:
+        forget_id(User, 'username', instance._loaded_username)
+    if not created and instance._loaded_name != shown_name(instance):
+        after_commit(
+            author_renamed, instance.pk, instance._loaded_username
+        )
+    instance._loaded_username = instance.username
+    instance._loaded_name = shown_name(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_id(User, 'username', instance.username)
@@ -0,0 +1,131 @@
+"""Потоковая отдача лент: начало страницы уходит клиенту сразу, посты -
+по мере чтения из базы.
+
+Шаблон ленты рендерится один раз с блоком posts, заменённым на метку
+(дочерний {% extends %} переопределяет блок), и режется по ней на
+начало - head из base.html и header.html - и конец. Между ними
+includes/post_text.html отрисовывается на каждую строку из
+QuerySet.iterator(): ни страница целиком, ни список постов в памяти не
+собираются.
+"""
+import uuid
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template import Context, engines
+from django.template.loader import get_template
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+
+from core.staticfiles import accepted_encodings
+
+from .cons import STREAM_CHUNK_SIZE
+from .exporting import GZIP_WBITS
+
+POSTS_BLOCK = 'posts'
+POST_TEMPLATE = 'includes/post_text.html'
+MARKER = f'<!--{POSTS_BLOCK}:{uuid.uuid4().hex}-->'
+split_template = SimpleLazyObject(lambda: engines['django'].from_string(
+    '{% extends feed_template %}'
+    f'{{% block {POSTS_BLOCK} %}}{MARKER}{{% endblock %}}'
+))
+
+
+def iter_rows(page):
+    object_list = page.object_list
+    if isinstance(object_list, QuerySet):
+        return object_list.iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return iter(object_list)
+
+
+def render_posts(page):
+    """post_text.html на каждый пост страницы, с forloop как в цикле."""
+    template = get_template(POST_TEMPLATE).template
+    context = Context()
+    rows = iter_rows(page)
+    post = next(rows, None)
+    counter = 0
+    while post is not None:
+        following = next(rows, None)
+        counter += 1
+        forloop = {
+            'counter': counter,
+            'first': counter == 1,
+            'last': following is None,
+        }
+        with context.push(post=post, forloop=forloop):
+            yield template.render(context)
+        post = following
+
+
+def stream_render(request, template_name, context):
+    """Как render(), но посты page_obj отдаются по одному.
+
+    Начало и конец страницы рендерятся сразу, поэтому ошибки шаблона
+    дают обычный 500, а не оборванный ответ.
+    """
+    html = split_template.render(
+        dict(context, feed_template=template_name), request
+    )
+    if MARKER not in html:
+        raise ValueError(f'В {template_name} нет блока {POSTS_BLOCK}')
+    head, tail = html.split(MARKER, 1)
+
+    def chunks():
+        yield head
+        yield from render_posts(context['page_obj'])
+        yield tail
+
+    return StreamingHttpResponse(chunks())
+
+
+def render_feed(request, template_name, context):
+    if settings.POSTS_STREAMING_FEEDS:
+        return stream_render(request, template_name, context)
+    return render(request, template_name, context)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for chunk in chunks:
+        # Z_SYNC_FLUSH: сжатый кусок уходит клиенту сразу, а не ждёт
+        # в буфере zlib конца страницы.
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def gzip_stream(view):
+    """Сжимает потоковый ответ на лету, если клиент принимает gzip.
+
+    Стоит снаружи кэша страниц: в кэш попадает несжатый HTML.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if (
+            not response.streaming
+            or not settings.POSTS_STREAMING_GZIP
+            or response.has_header('Content-Encoding')
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if 'gzip' in accepted:
+            response.streaming_content = gzip_chunks(
+                response.streaming_content
+            )
+            response['Content-Encoding'] = 'gzip'
+            # Как GZipMiddleware: сжатое тело - уже другие байты, сильный
+            # ETag conditional_page для него ослабляется. If-None-Match
+            # сравнивается слабо, так что 304 по нему по-прежнему отдаётся.
+            etag = response.get('ETag')
+            if etag and etag.startswith('"'):
+                response['ETag'] = 'W/' + etag
+        return response
+    return wrapper
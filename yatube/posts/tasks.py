@@ -0,0 +1,52 @@
+"""Побочные эффекты записи постов, которым не место в запросе.
+
+Ставятся в очередь core.tasks из posts.signals; аргумент - id поста.
+"""
+from core.tasks import task
+
+from . import search
+from .caching import invalidate_post_page
+from .models import GroupStats, Post
+from .thumbnails import generate_thumbnails, ready_thumbnails
+
+SEARCH_INDEX = 'posts.search_index'
+REFRESH_PAGES = 'posts.refresh_pages'
+REFRESH_GROUP_STATS = 'posts.group_stats'
+THUMBNAILS = 'posts.thumbnails'
+
+
+@task(SEARCH_INDEX)
+def update_search_index(post_ids):
+    """Переиндексирует текст постов, удалённые убирает из индекса."""
+    found = set()
+    for post in Post.objects.filter(pk__in=post_ids).only('text'):
+        search.index_post(post)
+        found.add(post.pk)
+    for post_id in set(post_ids) - found:
+        search.unindex_post(post_id)
+
+
+@task(REFRESH_PAGES)
+def refresh_feed_pages(post_ids):
+    """Сбрасывает страницы лент, где выводятся изменённые посты."""
+    for post in Post.objects.filter(pk__in=post_ids).only(
+        'pub_date', 'author', 'group'
+    ):
+        invalidate_post_page(post)
+
+
+@task(REFRESH_GROUP_STATS, background=True)
+def refresh_group_stats(payloads):
+    GroupStats.rebuild()
+
+
+@task(THUMBNAILS, background=True)
+def make_thumbnails(post_ids):
+    """Миниатюры картинок постов; карточки постов в лентах обновятся."""
+    for post in Post.objects.filter(pk__in=post_ids).exclude(image=''):
+        if ready_thumbnails(post) is not None:
+            continue
+        post.thumbnails = generate_thumbnails(post.image)
+        # Новое updated - новый ключ фрагмента карточки, страницы лент
+        # и валидаторы сбрасывают сигналы posts.signals.
+        post.save(update_fields=('thumbnails', 'updated'))
@@ -0,0 +1,15 @@
+from django import template
+
+from posts.thumbnails import placeholders, ready_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnails(post):
+    """Готовые миниатюры картинки поста, до их генерации - заглушки.
+
+    Читает только поле поста: {% post_thumbnails post as thumbnails %},
+    затем thumbnails.feed.url, .width, .height.
+    """
+    return ready_thumbnails(post) or placeholders()
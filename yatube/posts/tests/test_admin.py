@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+from .utils import QueryBudgetMixin
+
+# Сессия, пользователь, ключи страницы и её строки - без COUNT(*)
+# и без запроса на каждую строку.
+CHANGELIST_QUERY_BUDGET = 4
+
+
+class PostAdminTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='Описание',
+            )
+            for number in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                author=cls.admin, text=f'Пост {number}',
+                group=cls.groups[0] if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        model_admin = admin.site._registry[Post]
+        self.addCleanup(
+            setattr, model_admin, 'list_per_page', model_admin.list_per_page
+        )
+        model_admin.list_per_page = 2
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def shown(self, response):
+        return [post.pk for post in response.context['cl'].result_list]
+
+    def test_keyset_pages(self):
+        """Страницы по ?cursor= обходят все посты от новых к старым."""
+        expected = [post.pk for post in reversed(self.posts)]
+        seen = []
+        response = self.client.get(self.url)
+        while True:
+            seen += self.shown(response)
+            next_url = response.context['cl'].next_url
+            if not next_url:
+                break
+            response = self.client.get(self.url + next_url)
+        self.assertEqual(seen, expected)
+        previous_url = response.context['cl'].previous_url
+        response = self.client.get(self.url + previous_url)
+        self.assertEqual(self.shown(response), expected[2:4])
+
+    def test_changelist_queries_do_not_grow(self):
+        """Запросов столько же при 2 и 5 строках, COUNT(*) не нужен."""
+        self.client.get(self.url)
+        admin.site._registry[Post].list_per_page = 5
+        with self.assertMaxQueries(CHANGELIST_QUERY_BUDGET) as captured:
+            response = self.client.get(self.url)
+        self.assertEqual(len(self.shown(response)), 5)
+        for query in captured:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_group_widget_renders_only_selected(self):
+        """В строках нет <select> со всеми группами."""
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Группа 0')
+        self.assertNotContains(response, 'Группа 1')
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_list_editable_saves_group(self):
+        response = self.client.get(self.url)
+        post = response.context['cl'].result_list[0]
+        data = {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': post.pk,
+            'form-0-group': self.groups[2].pk,
+            '_save': 'Сохранить',
+        }
+        self.client.post(self.url, data)
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.groups[2])
+
+    def test_date_filter_and_filtered_count(self):
+        """Фильтр по дате - диапазон pub_date, число с фильтром кэшируется."""
+        start = self.posts[0].pub_date.date()
+        params = {
+            'pub_date__gte': start.isoformat(),
+            'pub_date__lt': (start + timedelta(days=1)).isoformat(),
+        }
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.context['cl'].result_count, 5)
+        sql = str(response.context['cl'].queryset.query)
+        self.assertIn('"posts_post"."pub_date" >=', sql)
+        self.assertNotIn('django_datetime_extract', sql)
+        Post.objects.create(author=self.admin, text='Ещё один')
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.context['cl'].result_count, 5)
+        params['pub_date__lt'] = params['pub_date__gte']
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_changelist_has_no_distinct_dates(self):
+        """Страница не строит список дат DISTINCT по всей таблице."""
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(self.url)
+        for query in captured:
+            self.assertNotIn('DISTINCT', query['sql'].upper())
@@ -0,0 +1,97 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.exporting import iter_posts
+from posts.models import Group, Post, User
+
+
+POSTS_COUNT = 7
+
+
+class ExportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}, "в кавычках"',
+                 group=cls.group if i % 2 else None)
+            for i in range(POSTS_COUNT)
+        )
+        # Все посты в одну секунду - порядок внутри решает id.
+        moment = timezone.now() - timedelta(days=1)
+        Post.objects.update(pub_date=moment)
+        cls.newest = Post.objects.create(author=cls.user, text='Свежий пост')
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_keyset_chunks_cover_all_posts(self):
+        """Чанки меньше таблицы: каждый пост выгружен ровно один раз."""
+        ids = [row[0] for row in iter_posts(chunk_size=3)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(
+            ids, list(Post.objects.order_by('pub_date', 'id')
+                      .values_list('id', flat=True))
+        )
+
+    def test_command_writes_gzipped_jsonl_since(self):
+        """--since отсекает старые посты, --gzip сжимает поток."""
+        fd, path = tempfile.mkstemp(suffix='.jsonl.gz')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        call_command('export_posts', output=path, since=since, gzip=True)
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['text'], 'Свежий пост')
+        self.assertEqual(records[0]['author'], 'user')
+        self.assertIsNone(records[0]['group'])
+
+    def test_command_writes_to_stdout(self):
+        """Без --output выгрузка идёт в stdout команды."""
+        out = io.StringIO()
+        call_command('export_posts', format='csv', stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(len(rows), POSTS_COUNT + 1)
+        with self.assertRaises(CommandError):
+            call_command('export_posts', gzip=True, stdout=io.StringIO())
+
+    def test_endpoint_streams_csv(self):
+        """Сотрудник получает CSV потоком, остальные - нет."""
+        url = reverse('posts:export')
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), POSTS_COUNT + 1)
+        self.assertEqual(rows[1]['text'], 'Пост 1, "в кавычках"')
+        self.assertEqual(rows[1]['group'], 'test-slug')
+
+    def test_endpoint_rejects_bad_params(self):
+        """Неизвестный формат и битая дата - 400, а не пустая выгрузка."""
+        url = reverse('posts:export')
+        for params in ({'format': 'xml'}, {'since': 'вчера'}):
+            with self.subTest(params=params):
+                response = self.staff_client.get(url, params)
+                self.assertEqual(response.status_code, 400)
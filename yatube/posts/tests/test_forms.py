@@ -1,13 +1,38 @@
-from django.test import Client, TestCase
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from http import HTTPStatus
 
+from core.models import Task
+from core.tasks import run_batch
+from posts.cons import PLACEHOLDER_IMAGE
 from posts.forms import PostForm
 from posts.models import Group, Post, User
+from posts.tasks import THUMBNAILS
+from posts.thumbnails import ready_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostCreateFormTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -58,6 +83,36 @@ class PostCreateFormTests(TestCase):
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
+    def test_create_post_with_image(self):
+        """Пост с картинкой создаётся сразу с заглушкой; миниатюры
+        делает обработчик очереди, а не запрос."""
+        form_data = {
+            'text': 'Пост с картинкой',
+            'group': self.group.pk,
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        }
+        self.authorized_client.post(
+            reverse('posts:post_create'), data=form_data, follow=True
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual(post.image.name, 'posts/small.gif')
+        self.assertIsNone(ready_thumbnails(post))
+        self.assertTrue(Task.objects.filter(name=THUMBNAILS).exists())
+        detail = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.assertContains(self.guest_client.get(detail), PLACEHOLDER_IMAGE)
+
+        while run_batch()[0]:
+            pass
+        post.refresh_from_db()
+        thumbnails = ready_thumbnails(post)
+        self.assertEqual(thumbnails['feed']['width'], 960)
+        self.assertIn('/media/cache/', thumbnails['feed']['url'])
+        self.assertContains(
+            self.guest_client.get(detail), thumbnails['feed']['url']
+        )
+
     def test_create_post_guest_client(self):
         """Неавторизованный пользователь пытается создать пост"""
         posts_count = Post.objects.count()
@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core import cache as two_tier
+from core.models import Task
+from core.tasks import run_batch
+from posts.cons import PLACEHOLDER_IMAGE
+from posts.models import Post, User
+from posts.tasks import THUMBNAILS
+
+from .test_forms import SMALL_GIF
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FeedThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        two_tier.local.clear()
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_placeholder_until_thumbnails_ready(self):
+        """Лента не открывает картинку: до задачи - заглушка."""
+        self.create_post()
+        url = reverse('posts:index')
+        with mock.patch('PIL.Image.open') as image_open:
+            response = self.client.get(url)
+        image_open.assert_not_called()
+        self.assertContains(response, PLACEHOLDER_IMAGE)
+        self.assertTrue(Task.objects.filter(name=THUMBNAILS).exists())
+        self.run_tasks()
+        response = self.client.get(url)
+        self.assertNotContains(response, PLACEHOLDER_IMAGE)
+        self.assertContains(response, '/media/cache/')
+
+    def run_tasks(self):
+        while run_batch(10)[0]:
+            pass
+
+    def test_ready_thumbnails_survive_cache_loss(self):
+        """Отметка о миниатюрах в базе: её видит процесс с пустым кэшем,
+        и лента не ставит задачи заново."""
+        self.create_post()
+        self.run_tasks()
+        cache.clear()
+        two_tier.local.clear()
+        url = reverse('posts:index')
+        self.assertNotContains(self.client.get(url), PLACEHOLDER_IMAGE)
+        self.assertFalse(Task.objects.filter(name=THUMBNAILS).exists())
+
+    def test_new_image_shows_placeholder_until_ready(self):
+        """Миниатюры прежней картинки не выдаются за миниатюры новой."""
+        post = self.create_post()
+        self.run_tasks()
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        url = reverse('posts:index')
+        self.assertContains(self.client.get(url), PLACEHOLDER_IMAGE)
+        self.run_tasks()
+        post.refresh_from_db()
+        self.assertIn('other', post.thumbnails)
+        self.assertNotContains(self.client.get(url), PLACEHOLDER_IMAGE)
+
+    def test_sorl_keys_kept_in_cache(self):
+        self.create_post()
+        self.run_tasks()
+        self.assertFalse(KVStoreModel.objects.exists())
+        self.assertTrue(any(
+            'sorl-thumbnail' in key for key in two_tier.local.entries
+        ))
@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.importing import manual_pub_date
+from posts.models import AuthorStats, Group, Post, User
+from posts.search import search_posts, unindex_post
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write_jsonl(self, rows):
+        path = os.path.join(self.dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def call(self, *args, **options):
+        out = StringIO()
+        call_command(
+            'import_posts', *args, stdout=out, stderr=StringIO(), **options
+        )
+        return out.getvalue()
+
+    def test_jsonl_import(self):
+        """Посты ложатся с авторами, группами и датами; новые авторы
+        и группы создаются, счётчики и поиск пересобираются.
+        """
+        path = self.write_jsonl([
+            {'text': 'Архивный пост', 'author': 'user', 'group': 'test-slug',
+             'pub_date': '2015-03-01T12:00:00+00:00'},
+            {'text': 'Пост нового автора', 'author': 'newbie',
+             'group': 'new-group'},
+            {'text': 'Без группы', 'author': 'user'},
+            {'text': '', 'author': 'user'},
+        ])
+        self.guest_client.get(reverse('posts:index'))
+        output = self.call(path, batch_size=1, chunk_size=2)
+        self.assertIn('Загружено 3 постов', output)
+        post = Post.objects.get(text='Архивный пост')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2015)
+        newbie = User.objects.get(username='newbie')
+        self.assertTrue(Group.objects.filter(slug='new-group').exists())
+        self.assertEqual(AuthorStats.for_author(self.user).posts_count, 2)
+        self.assertEqual(AuthorStats.for_author(newbie).posts_count, 1)
+        self.assertEqual(
+            list(search_posts(Post.objects.all(), 'архивный')), [post]
+        )
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')), 'Без группы'
+        )
+
+    def test_instant_chunk_reports_rate(self):
+        """Пачка за 0 секунд не делит на ноль в отчёте о скорости."""
+        path = self.write_jsonl([{'text': 'Быстрый пост', 'author': 'user'}])
+        with mock.patch(
+            'posts.management.commands.import_posts.time.monotonic',
+            return_value=100.0,
+        ):
+            output = self.call(path)
+        self.assertIn('Строк: 1, постов: 1', output)
+
+    def test_csv_import(self):
+        """CSV с заголовком читается так же, как JSON Lines."""
+        path = os.path.join(self.dir.name, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, ('text', 'author', 'group'))
+            writer.writeheader()
+            writer.writerow({'text': 'Из CSV, с запятой', 'author': 'user',
+                             'group': 'test-slug'})
+        self.call(path)
+        self.assertTrue(
+            self.group.groups.filter(text='Из CSV, с запятой').exists()
+        )
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск с --checkpoint не грузит строки дважды."""
+        rows = [{'text': f'Пост {i}', 'author': 'user'} for i in range(5)]
+        path = self.write_jsonl(rows[:3])
+        checkpoint = os.path.join(self.dir.name, 'checkpoint')
+        self.call(path, chunk_size=2, checkpoint=checkpoint)
+        with open(checkpoint) as file:
+            self.assertEqual(file.read(), '3')
+        path = self.write_jsonl(rows)
+        self.call(path, chunk_size=2, checkpoint=checkpoint)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [row['text'] for row in rows]
+        )
+
+    def test_bad_rows_are_skipped(self):
+        """Битый JSON, не-объект, не-строки и неверная дата - ошибки
+        своих строк, остальные строки загружаются."""
+        path = os.path.join(self.dir.name, 'posts.jsonl')
+        lines = [
+            '{"text": "Первый", "author": "user"}',
+            '{"text": "обрыв',
+            '["text", "author"]',
+            '{"text": 42, "author": "user"}',
+            '{"text": "Дата", "author": "user", "pub_date": "2020-13-45"}',
+            '{"text": "Последний", "author": "user"}',
+        ]
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        err = StringIO()
+        call_command('import_posts', path, stdout=StringIO(), stderr=err)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Первый', 'Последний']
+        )
+        for number in range(2, 6):
+            with self.subTest(number=number):
+                self.assertIn(f'Строка {number} пропущена', err.getvalue())
+
+    def test_default_batch_size_and_indexing(self):
+        """Пачка по умолчанию урезается до лимита SQLite; в поиск
+        попадают только загруженные посты."""
+        old = Post.objects.create(author=self.user, text='Старый пост')
+        unindex_post(old.pk)
+        path = self.write_jsonl(
+            {'text': f'Загруженный {number}', 'author': 'user'}
+            for number in range(600)
+        )
+        self.call(path)
+        self.assertEqual(self.user.posts.count(), 601)
+        self.assertEqual(
+            search_posts(Post.objects.all(), 'загруженный').count(), 600
+        )
+        self.assertFalse(search_posts(Post.objects.all(), 'старый'))
+
+    def test_manual_pub_date_is_scoped(self):
+        """Другие потоки во время импорта получают обычный pub_date."""
+        field = Post._meta.get_field('pub_date')
+        old = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+        def pub_date():
+            post = Post(author=self.user, text='Пост', pub_date=old)
+            return field.pre_save(post, add=True)
+
+        elsewhere = []
+        with manual_pub_date():
+            thread = threading.Thread(
+                target=lambda: elsewhere.append(pub_date())
+            )
+            thread.start()
+            thread.join()
+            self.assertEqual(pub_date(), old)
+        self.assertNotEqual(elsewhere[0], old)
+        self.assertNotEqual(pub_date(), old)
@@ -1,7 +1,11 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
 
 from ..cons import LIMIT_CHAR
-from ..models import Group, Post, User
+from ..models import AuthorStats, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -32,3 +36,83 @@ class PostModelTest(TestCase):
         for key, value in fields.items():
             with self.subTest(key=key):
                 self.assertEqual(value.__str__(), key)
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(author=user)
+
+    def test_counter_follows_create_and_delete(self):
+        """Счётчик и дата последнего поста меняются вместе с постами."""
+        first = Post.objects.create(author=self.user, text='Первый')
+        second = Post.objects.create(author=self.user, text='Второй')
+        stats = self.stats(self.user)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.last_post_date, second.pub_date)
+
+        second.delete()
+        stats = self.stats(self.user)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_date, first.pub_date)
+
+        first.delete()
+        stats = self.stats(self.user)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post_date)
+
+    def test_counter_follows_author_change(self):
+        """Перенос поста другому автору переносит и счётчик."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        Post.objects.create(author=self.other, text='Пост')
+        post = Post.objects.get(pk=post.pk)
+        post.author = self.other
+        post.save()
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        self.assertEqual(self.stats(self.other).posts_count, 2)
+
+    def test_for_author_builds_missing_row(self):
+        """Для поста без сигнала (bulk_create) строка считается при чтении."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}') for i in range(3)
+        )
+        self.assertFalse(AuthorStats.objects.filter(author=self.user))
+        self.assertEqual(AuthorStats.for_author(self.user).posts_count, 3)
+        author = User.objects.select_related('post_stats').get(
+            pk=self.user.pk
+        )
+        with self.assertNumQueries(0):
+            AuthorStats.for_author(author)
+
+    def test_concurrent_first_reads(self):
+        """Строку уже вставил параллельный запрос - чтение не падает."""
+        Post.objects.bulk_create([Post(author=self.user, text='Пост')])
+        AuthorStats.rebuild(author_ids=[self.user.pk])
+        # Удаление «не увидело» строку, которую вставил соседний запрос.
+        with mock.patch('django.db.models.query.QuerySet.delete'):
+            AuthorStats.rebuild(author_ids=[self.user.pk])
+        author = User.objects.get(pk=self.user.pk)
+        self.assertEqual(AuthorStats.for_author(author).posts_count, 1)
+
+    def test_rebuild_many_authors(self):
+        """Пачки вставки урезаются до лимита SQLite на параметры."""
+        User.objects.bulk_create(
+            User(username=f'reader{number}') for number in range(600)
+        )
+        AuthorStats.rebuild()
+        self.assertEqual(
+            AuthorStats.objects.count(), User.objects.count()
+        )
+
+    def test_rebuild_command(self):
+        """rebuild_author_stats исправляет разошедшиеся счётчики."""
+        Post.objects.create(author=self.user, text='Пост')
+        AuthorStats.objects.filter(author=self.user).update(posts_count=42)
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.stats(self.other).posts_count, 0)
@@ -0,0 +1,323 @@
+import base64
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.feeds import INDEX_FEED, author_feed, get_cached_count, group_feed
+from posts.models import Group, Post, User
+from posts.paginators import (BACKWARD, FORWARD, CachedCountPaginator,
+                              CursorPaginator, cursor_signer, decode_cursor,
+                              elided_page_range, encode_cursor)
+from posts.views import NUMBER_OF_POSTS
+
+from .utils import OnCommitMixin
+
+
+POSTS_COUNT = 25
+
+
+def sign_cursor(raw):
+    value = base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    return cursor_signer().sign(value)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_COUNT)
+        )
+        # Пары постов с одинаковым временем: порядок решает id.
+        start = timezone.now()
+        for number, post in enumerate(Post.objects.order_by('id')):
+            post.pub_date = start + timedelta(minutes=number // 2)
+            post.save(update_fields=('pub_date',))
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), NUMBER_OF_POSTS)
+
+    def walk_forward(self):
+        pages = [self.paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(self.paginator.get_page(pages[-1].next_cursor))
+        return pages
+
+    def test_cursor_round_trip(self):
+        """Токен курсора декодируется в исходную позицию."""
+        post = self.expected[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post, FORWARD)),
+            (FORWARD, post.pub_date, post.pk)
+        )
+
+    def test_forward_walk_covers_feed_once(self):
+        """Переход по «Следующая» обходит ленту без пропусков и повторов."""
+        pages = self.walk_forward()
+        posts = [post for page in pages for post in page]
+        self.assertEqual(posts, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(len(pages[-1]), POSTS_COUNT % NUMBER_OF_POSTS)
+
+    def test_backward_walk_returns_same_pages(self):
+        """«Предыдущая» возвращает ровно ту страницу, что была до этого."""
+        pages = self.walk_forward()
+        page = pages[-1]
+        for expected_page in reversed(pages[:-1]):
+            page = self.paginator.get_page(page.previous_cursor)
+            self.assertEqual(list(page), list(expected_page))
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_opens_first_page(self):
+        """Битый токен ведёт на первую страницу, а не в ошибку."""
+        for cursor in ('garbage', '!!!', encode_cursor(self.expected[0], 'x')):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(cursor)
+                self.assertEqual(
+                    list(page), self.expected[:NUMBER_OF_POSTS]
+                )
+
+    def test_out_of_range_cursor_opens_first_page(self):
+        """Подписанный, но невозможный для БД токен - тоже первая страница.
+
+        Неподписанный токен с верной позицией не принимается.
+        """
+        post = self.expected[NUMBER_OF_POSTS]
+        unsigned = encode_cursor(post, FORWARD).rsplit('.', 1)[0]
+        cursors = (
+            unsigned,
+            sign_cursor(f'n|{post.pub_date.isoformat()}|{10 ** 23}'),
+            sign_cursor('n|0001-01-01T00:00:00+05:00|1'),
+            sign_cursor('n|2020-01-01T00:00:00|1'),
+            sign_cursor('n|2020-01-01T00:00:00+00:00|0'),
+        )
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(cursor)
+                self.assertEqual(
+                    list(page), self.expected[:NUMBER_OF_POSTS]
+                )
+
+    def test_query_count_does_not_depend_on_depth(self):
+        """Каждая страница - один запрос без COUNT(*)."""
+        last = self.expected[-NUMBER_OF_POSTS - 1]
+        with self.assertNumQueries(1):
+            self.paginator.get_page(encode_cursor(last, FORWARD))
+        with self.assertNumQueries(1):
+            self.paginator.get_page(encode_cursor(last, BACKWARD))
+
+
+class CachedCountPaginatorTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.other_group = Group.objects.create(
+            title='Группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_COUNT)
+        )
+        cls.feeds = {
+            INDEX_FEED: Post.objects.all(),
+            author_feed(cls.user.pk): cls.user.posts.all(),
+            group_feed(cls.group.pk): cls.group.groups.all(),
+            group_feed(cls.other_group.pk): cls.other_group.groups.all(),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def warm_up(self):
+        for feed, queryset in self.feeds.items():
+            CachedCountPaginator(queryset, NUMBER_OF_POSTS, feed).count
+
+    def assertCachedCounts(self, **expected):
+        feeds = {
+            'index': INDEX_FEED,
+            'author': author_feed(self.user.pk),
+            'group': group_feed(self.group.pk),
+            'other_group': group_feed(self.other_group.pk),
+        }
+        for name, count in expected.items():
+            with self.subTest(feed=name):
+                self.assertEqual(get_cached_count(feeds[name]), count)
+
+    def test_count_is_cached(self):
+        """COUNT(*) выполняется только при первом обращении."""
+        with self.assertNumQueries(1):
+            CachedCountPaginator(
+                Post.objects.all(), NUMBER_OF_POSTS, INDEX_FEED
+            ).count
+        with self.assertNumQueries(0):
+            paginator = CachedCountPaginator(
+                Post.objects.all(), NUMBER_OF_POSTS, INDEX_FEED
+            )
+            self.assertEqual(paginator.count, POSTS_COUNT)
+
+    def test_estimate_used_on_cold_cache(self):
+        """На холодном кэше берётся оценка, если она есть."""
+        with self.assertNumQueries(0):
+            paginator = CachedCountPaginator(
+                Post.objects.all(), NUMBER_OF_POSTS, INDEX_FEED,
+                estimate=lambda: 7,
+            )
+            self.assertEqual(paginator.count, 7)
+        paginator = CachedCountPaginator(
+            Post.objects.all(), NUMBER_OF_POSTS, 'empty',
+            estimate=lambda: None,
+        )
+        self.assertEqual(paginator.count, POSTS_COUNT)
+
+    def test_signals_keep_counts_in_sync(self):
+        """Создание, перенос в другую группу и удаление поста
+        сдвигают закэшированные размеры лент.
+        """
+        self.warm_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                author=self.user, text='Новый', group=self.group
+            )
+        self.assertCachedCounts(
+            index=POSTS_COUNT + 1, author=POSTS_COUNT + 1,
+            group=POSTS_COUNT + 1, other_group=0,
+        )
+        post.group = self.other_group
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertCachedCounts(
+            index=POSTS_COUNT + 1, group=POSTS_COUNT, other_group=1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertCachedCounts(
+            index=POSTS_COUNT, author=POSTS_COUNT,
+            group=POSTS_COUNT, other_group=0,
+        )
+
+    def test_rolled_back_post_keeps_counts(self):
+        """Откат транзакции не сдвигает размеры лент."""
+        self.warm_up()
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    Post.objects.create(
+                        author=self.user, text='Откат', group=self.group
+                    )
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertCachedCounts(
+            index=POSTS_COUNT, author=POSTS_COUNT,
+            group=POSTS_COUNT, other_group=0,
+        )
+
+
+class ElidedPageRangeTests(TestCase):
+    def test_short_feed_shows_all_pages(self):
+        """Короткая лента выводит все номера без пропусков."""
+        self.assertEqual(list(elided_page_range(2, 5)), [1, 2, 3, 4, 5])
+
+    def test_long_feed_keeps_ends_and_window(self):
+        """Первая, последняя и окно вокруг текущей, пропуски - None."""
+        self.assertEqual(
+            list(elided_page_range(10, 5000)),
+            [1, None, 7, 8, 9, 10, 11, 12, 13, None, 5000]
+        )
+        self.assertEqual(
+            list(elided_page_range(1, 5000)), [1, 2, 3, 4, None, 5000]
+        )
+        self.assertEqual(
+            list(elided_page_range(5000, 5000)),
+            [1, None, 4997, 4998, 4999, 5000]
+        )
+
+    def test_no_gap_for_single_page(self):
+        """Пропуск в одну страницу заменяем самой страницей."""
+        self.assertEqual(
+            list(elided_page_range(6, 5000)),
+            [1, 2, 3, 4, 5, 6, 7, 8, 9, None, 5000]
+        )
+
+    def test_feed_renders_elided_navigation(self):
+        """Лента из сотни страниц выводит десяток ссылок и многоточия."""
+        user = User.objects.create_user(username='user')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}')
+            for i in range(NUMBER_OF_POSTS * 100)
+        )
+        cache.clear()
+        response = Client().get(reverse('posts:index'), {'page': 50})
+        self.assertEqual(
+            response.context['page_range'],
+            [1, None, 47, 48, 49, 50, 51, 52, 53, None, 100]
+        )
+        self.assertContains(response, '&hellip;', count=2)
+        self.assertContains(response, '?page=100')
+        self.assertNotContains(response, '?page=20"')
+
+
+class CursorPaginationViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_COUNT)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_param_switches_feeds_to_cursor_pages(self):
+        """Параметр ?cursor= включает keyset-пагинацию на всех лентах."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'cursor': ''})
+                page_obj = response.context['page_obj']
+                self.assertTrue(response.context['cursor_pagination'])
+                self.assertEqual(len(page_obj), NUMBER_OF_POSTS)
+                self.assertContains(
+                    response, f'?cursor={page_obj.next_cursor}'
+                )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_setting_enables_cursor_pages(self):
+        """POSTS_CURSOR_PAGINATION включает курсоры без параметра."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertTrue(response.context['cursor_pagination'])
+        self.assertNotContains(response, '?page=')
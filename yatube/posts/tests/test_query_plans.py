@@ -0,0 +1,84 @@
+import re
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+POST_TABLE = Post._meta.db_table
+# Полный проход по таблице без индекса или сортировка во временном B-tree.
+BAD_PLAN_PATTERNS = (
+    re.compile(rf'^SCAN (TABLE )?{POST_TABLE}$'),
+    re.compile(r'USE TEMP B-TREE'),
+)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(15)
+        )
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def feed_urls(self):
+        feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        urls = [reverse('posts:post_detail', kwargs={'post_id': self.post.id})]
+        for feed in feeds:
+            urls += [feed, f'{feed}?page=2', f'{feed}?cursor=']
+        return urls
+
+    def post_query_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if POST_TABLE not in sql or not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def test_feeds_use_indexes(self):
+        """Запросы лент не сканируют posts_post целиком и не сортируют
+        результат во временном B-tree.
+        """
+        for url in self.feed_urls():
+            for sql, plan in self.post_query_plans(url):
+                for detail in plan:
+                    for pattern in BAD_PLAN_PATTERNS:
+                        with self.subTest(url=url, sql=sql, plan=detail):
+                            self.assertIsNone(pattern.search(detail))
+
+    def test_cursor_pages_use_indexes(self):
+        """Следующие страницы keyset-пагинации тоже идут по индексу."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        response = self.guest_client.get(url, {'cursor': ''})
+        next_url = f'{url}?cursor={response.context["page_obj"].next_cursor}'
+        for sql, plan in self.post_query_plans(next_url):
+            for detail in plan:
+                for pattern in BAD_PLAN_PATTERNS:
+                    with self.subTest(sql=sql, plan=detail):
+                        self.assertIsNone(pattern.search(detail))
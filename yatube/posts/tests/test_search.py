@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.cons import NUMBER_OF_POSTS
+from posts.models import Group, Post, User
+from posts.search import rebuild_index, search_posts
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user, text='Котики и собаки', group=cls.group
+        )
+        cls.new_post = Post.objects.create(
+            author=cls.user, text='Котики спят', group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Погода на завтра'
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=365)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def search(self, text):
+        return list(search_posts(Post.objects.all(), text))
+
+    def test_matches_words_case_insensitive(self):
+        """Поиск находит посты по словам без учёта регистра."""
+        self.assertEqual(
+            set(self.search('КОТИКИ')), {self.old_post, self.new_post}
+        )
+        self.assertEqual(self.search('котики собаки'), [self.old_post])
+        self.assertEqual(self.search('слон'), [])
+
+    def test_fresh_posts_rank_higher(self):
+        """При равной релевантности свежий пост идёт первым."""
+        self.assertEqual(self.search('котики'), [self.new_post, self.old_post])
+
+    def test_query_syntax_is_escaped(self):
+        """Кавычки и операторы FTS в запросе не ломают поиск."""
+        for text in ('"котики', 'котики OR', 'NEAR(', '***'):
+            with self.subTest(text=text):
+                self.search(text)
+
+    def test_index_follows_edit_and_delete(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        post = Post.objects.get(pk=self.other_post.pk)
+        post.text = 'Котики на завтра'
+        post.save()
+        self.assertIn(post, self.search('котики'))
+        self.assertEqual(self.search('погода'), [])
+        post.delete()
+        self.assertEqual(self.search('завтра'), [])
+
+    def test_search_view(self):
+        """Страница поиска показывает найденные посты и держит ?q=
+        в ссылках пагинатора.
+        """
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Котики опять')
+            for _ in range(NUMBER_OF_POSTS)
+        )
+        # bulk_create мимо сигналов - индекс пересобираем вручную.
+        rebuild_index()
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'котики'}
+        )
+        self.assertEqual(response.context['query'], 'котики')
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            NUMBER_OF_POSTS + 2
+        )
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA'
+                                      '%D0%B8&amp;page=2')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через полнотекстовый индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'погода'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.other_post]
+        )
@@ -0,0 +1,98 @@
+import gzip
+import zlib
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.views import NUMBER_OF_POSTS
+
+
+def compact(html):
+    """HTML без пробельных символов: у цикла в шаблоне свои отступы."""
+    return ''.join(html.split())
+
+
+class StreamingFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(NUMBER_OF_POSTS + 3)
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:index') + '?page=2',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get(self, url, **extra):
+        with override_settings(POSTS_STREAMING_FEEDS=True):
+            response = self.client.get(url, **extra)
+            self.assertTrue(response.streaming)
+            chunks = list(response.streaming_content)
+        return response, chunks
+
+    def test_same_page_as_render(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                rendered = self.client.get(url).content.decode()
+                _, chunks = self.get(url)
+                streamed = b''.join(chunks).decode()
+                self.assertEqual(compact(streamed), compact(rendered))
+
+    def test_head_and_posts_are_separate_chunks(self):
+        """Сначала <head> и шапка, затем по куску на пост."""
+        _, chunks = self.get(reverse('posts:index'))
+        self.assertIn(b'</header>', chunks[0])
+        self.assertNotIn(b'<article>', chunks[0])
+        self.assertEqual(len(chunks), NUMBER_OF_POSTS + 2)
+        self.assertNotIn(b'<hr>', chunks[-2])
+
+    def test_gzip_on_the_fly(self):
+        url = reverse('posts:index')
+        _, plain = self.get(url)
+        with override_settings(POSTS_STREAMING_GZIP=True):
+            response, chunks = self.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        # Первый сжатый кусок уже распаковывается в начало страницы.
+        self.assertEqual(
+            zlib.decompressobj(wbits=31).decompress(chunks[0]), plain[0]
+        )
+        self.assertEqual(gzip.decompress(b''.join(chunks)), b''.join(plain))
+
+    def test_gzip_etag_is_weak(self):
+        """Сжатый и несжатый ответы не делят один сильный ETag."""
+        url = reverse('posts:index')
+        plain, _ = self.get(url)
+        with override_settings(POSTS_STREAMING_GZIP=True):
+            response, _ = self.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+            with override_settings(POSTS_STREAMING_FEEDS=True):
+                cached = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING='gzip',
+                    HTTP_IF_NONE_MATCH=response['ETag'],
+                )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_anonymous_page_cached_after_stream(self):
+        client = Client()
+        url = reverse('posts:index')
+        with override_settings(POSTS_STREAMING_FEEDS=True):
+            streamed = b''.join(client.get(url).streaming_content)
+            with self.assertNumQueries(0):
+                response = client.get(url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, streamed)
@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timelines
+from posts.cons import NUMBER_OF_POSTS
+from posts.feeds import author_feed, group_feed
+from posts.models import Group, Post, User
+
+from .utils import OnCommitMixin
+
+POSTS_COUNT = 15
+
+
+@override_settings(POSTS_TIMELINES=True)
+class TimelineTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.other_group = Group.objects.create(
+            title='Группа 2',
+            slug='test-slug-2',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_COUNT)
+        )
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def page_posts(self, url, page=1):
+        response = self.client.get(url, {'page': page})
+        return list(response.context['page_obj'])
+
+    def expected(self, queryset, page=1):
+        start = (page - 1) * NUMBER_OF_POSTS
+        return list(
+            queryset.order_by('-pub_date', '-id')[
+                start:start + NUMBER_OF_POSTS
+            ]
+        )
+
+    def test_pages_match_database_order(self):
+        """Страницы из материализованной ленты совпадают с выборкой из БД."""
+        feeds = {
+            self.group_url: self.group.groups.all(),
+            self.profile_url: self.user.posts.all(),
+        }
+        for url, queryset in feeds.items():
+            for page in (1, 2):
+                with self.subTest(url=url, page=page):
+                    self.assertEqual(
+                        self.page_posts(url, page),
+                        self.expected(queryset, page)
+                    )
+
+    def test_write_fans_out_to_timelines(self):
+        """Новый пост попадает в ленты, перенос и удаление - убирают его."""
+        self.page_posts(self.group_url)
+        self.page_posts(self.profile_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                author=self.user, text='Свежий', group=self.group
+            )
+        complete, entries = cache.get(
+            timelines.timeline_key(group_feed(self.group.pk))
+        )
+        self.assertEqual(entries[0], timelines.entry(post))
+        self.assertEqual(self.page_posts(self.group_url)[0], post)
+        self.assertEqual(self.page_posts(self.profile_url)[0], post)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.group = self.other_group
+            post.save()
+        self.assertNotIn(post, self.page_posts(self.group_url))
+
+        deleted = timelines.entry(post)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertNotIn('Свежий', [
+            post.text for post in self.page_posts(self.profile_url)
+        ])
+        complete, entries = cache.get(
+            timelines.timeline_key(author_feed(self.user.pk))
+        )
+        self.assertNotIn(deleted, entries)
+
+    def test_page_read_is_bounded_id_lookup(self):
+        """Тёплая лента читается одной выборкой постов по id."""
+        self.page_posts(self.group_url)
+        feed = timelines.TimelineFeed(
+            group_feed(self.group.pk), self.group.groups.all()
+        )
+        with self.assertNumQueries(1):
+            feed[0:NUMBER_OF_POSTS]
+
+    @mock.patch.object(timelines, 'TIMELINE_SIZE', NUMBER_OF_POSTS)
+    def test_pages_beyond_timeline_read_database(self):
+        """Страницы глубже материализованной части берутся из БД."""
+        self.assertEqual(
+            self.page_posts(self.group_url, 2),
+            self.expected(self.group.groups.all(), 2)
+        )
+        complete, entries = cache.get(
+            timelines.timeline_key(group_feed(self.group.pk))
+        )
+        self.assertFalse(complete)
+        self.assertEqual(len(entries), NUMBER_OF_POSTS)
+
+    @mock.patch.object(timelines, 'TIMELINE_SIZE', NUMBER_OF_POSTS)
+    def test_older_post_drops_incomplete_timeline(self):
+        """Пост старше неполного окна сбрасывает ленту, а не рвёт её."""
+        self.page_posts(self.group_url)
+        feed = group_feed(self.group.pk)
+        newest = self.expected(self.group.groups.all())[0]
+        oldest = self.group.groups.order_by('pub_date', 'id').first()
+        # Удаление освободило место в окне - вставка бы не обрезалась.
+        timelines.remove(feed, newest.pk)
+        timelines.push(feed, oldest)
+        self.assertIsNone(cache.get(timelines.timeline_key(feed)))
+        self.assertEqual(
+            self.page_posts(self.group_url, 2),
+            self.expected(self.group.groups.all(), 2)
+        )
@@ -43,6 +43,7 @@ class TaskURLTests(TestCase):
         templates_url_names = {
 
             reverse('posts:index'): 'posts/index.html',
+            reverse('posts:groups'): 'posts/groups.html',
             reverse('posts:group_list',
                     kwargs={'slug': self.group.slug}): 'posts/group_list.html',
             reverse('posts:profile',
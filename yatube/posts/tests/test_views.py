@@ -1,9 +1,30 @@
+from datetime import timedelta
+
 from django import forms
 from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import run_batch
+from posts.models import AuthorStats, Group, GroupStats, Post, User
+from posts.views import NUMBER_OF_POSTS
+
+from .utils import OnCommitMixin, QueryBudgetMixin
+
 
-from posts.models import Group, Post, User
+# Запросов на страницу для анонимного пользователя, не зависит от
+# числа постов на странице. Сюда входит проверка валидаторов HTTP:
+# id группы/автора на холодном кэше и время правки поста.
+QUERY_BUDGETS = {
+    'posts:index': 2,
+    'posts:group_list': 4,
+    'posts:profile': 4,
+    'posts:post_detail': 2,
+}
 
 
 class PostDetailTests(TestCase):
@@ -102,6 +123,7 @@ class PostDetailTests(TestCase):
         form_fields = {
             'text': forms.fields.CharField,
             'group': forms.fields.ChoiceField,
+            'image': forms.fields.ImageField,
         }
         for value, expected in form_fields.items():
             with self.subTest(value=value):
@@ -118,6 +140,7 @@ class PostDetailTests(TestCase):
         form_fields = {
             'text': forms.fields.CharField,
             'group': forms.fields.ChoiceField,
+            'image': forms.fields.ImageField,
         }
         for value, expected in form_fields.items():
             with self.subTest(value=value):
@@ -144,3 +167,396 @@ class PostDetailTests(TestCase):
                 response = self.authorized_client.get(value)
                 form_field = response.context['page_obj']
                 self.assertIn(expected, form_field)
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.user = User.objects.create_user(username='user')
+        authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(NUMBER_OF_POSTS)
+        ]
+        Post.objects.bulk_create(
+            Post(author=author, text='Тестовый пост', group=cls.group)
+            for author in authors
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text='Тестовый пост', group=cls.group)
+            for _ in range(NUMBER_OF_POSTS)
+        )
+        AuthorStats.rebuild()
+        cls.post = Post.objects.filter(author=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_views_stay_within_query_budget(self):
+        """Ленты и страница поста укладываются в бюджет запросов:
+        автор и группа выбираются вместе с постами, а не по одному.
+        """
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.user}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ),
+        }
+        for view_name, url in urls.items():
+            with self.subTest(view_name=view_name):
+                with self.assertMaxQueries(QUERY_BUDGETS[view_name]):
+                    response = self.guest_client.get(url)
+                if view_name != 'posts:post_detail':
+                    self.assertEqual(
+                        len(response.context['page_obj']), NUMBER_OF_POSTS
+                    )
+
+
+class PageCacheTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_pages_served_from_cache(self):
+        """Повторный анонимный запрос ленты не обращается к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+                self.assertIn('Cookie', second['Vary'])
+
+    def test_authorized_pages_not_cached(self):
+        """Авторизованному пользователю страница рендерится заново."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertIsNotNone(response.context)
+
+    def test_non_decimal_page_falls_back_to_first(self):
+        """Номер страницы вроде '²' отдаёт первую страницу, а не 500."""
+        for url in self.urls:
+            for page in ('²', 'abc', '-2'):
+                with self.subTest(url=url, page=page):
+                    response = self.guest_client.get(url, {'page': page})
+                    self.assertContains(response, self.post.text)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден в закэшированных лентах."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Свежий пост', 'group': self.group.pk},
+            )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_rolled_back_post_keeps_pages(self):
+        """Откатившийся пост не сбрасывает кэш страниц."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    Post.objects.create(author=self.user, text='Откат')
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        for url in self.urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.guest_client.get(url)
+
+    def test_non_ascii_username_page_invalidated(self):
+        """Ключ страницы один и для раскодированного пути, и для reverse()."""
+        author = User.objects.create_user(username='иван')
+        url = reverse('posts:profile', kwargs={'username': author})
+        self.guest_client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=author, text='Пост Ивана')
+        self.assertContains(self.guest_client.get(url), 'Пост Ивана')
+
+    def test_author_rename_refreshes_post_cards(self):
+        """Новое имя автора видно в закэшированных лентах и фрагментах."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            author.first_name = 'Переименованный'
+            author.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'Переименованный'
+                )
+
+    def test_edit_invalidates_post_page(self):
+        """Правка поста сбрасывает страницу ленты и фрагмент поста."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Исправленный пост')
+                self.assertNotContains(response, 'Тестовый пост')
+
+    def test_group_change_invalidates_both_groups(self):
+        """Перенос поста в другую группу обновляет страницы обеих групп."""
+        other = Group.objects.create(title='Другая', slug='other-slug')
+        other_url = reverse('posts:group_list', kwargs={'slug': other.slug})
+        self.guest_client.get(self.urls[1])
+        self.guest_client.get(other_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+                data={'text': self.post.text, 'group': other.pk},
+            )
+        self.assertNotContains(
+            self.guest_client.get(self.urls[1]), self.post.text
+        )
+        self.assertContains(self.guest_client.get(other_url), self.post.text)
+
+
+class ConditionalGetTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа Тест',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_matching_etag_returns_304(self):
+        """Совпавший If-None-Match даёт 304 без рендеринга: лентам
+        хватает кэша, посту - одного запроса за временем правки.
+        """
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                queries = 1 if url == self.urls[-1] else 0
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_returns_304(self):
+        """Анонимный запрос с If-Modified-Since тоже получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                modified = self.guest_client.get(url)['Last-Modified']
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=modified
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        """Правка поста меняет ETag всех страниц, где он виден."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+                data={'text': 'Исправленный пост', 'group': self.group.pk},
+            )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def assert_refreshed(self, urls, change, text):
+        etags = {url: self.guest_client.get(url)['ETag'] for url in urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, text)
+
+    def test_author_rename_changes_etag(self):
+        """Имя автора выводится на всех страницах с его постом."""
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Новое Имя'
+        self.assert_refreshed(self.urls, author.save, 'Новое Имя')
+
+    def test_group_rename_changes_etag(self):
+        """Название группы - на её странице и на странице поста."""
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новая группа'
+        self.assert_refreshed(
+            (self.urls[1], self.urls[3]), group.save, 'Новая группа'
+        )
+
+    def test_etag_depends_on_user(self):
+        """Анонимный ETag не подходит авторизованному пользователю."""
+        etag = self.guest_client.get(self.urls[0])['ETag']
+        response = self.authorized_client.get(
+            self.urls[0], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_cache_control(self):
+        """Анонимные ответы можно кэшировать в CDN, личные - нет."""
+        response = self.guest_client.get(self.urls[0])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        response = self.authorized_client.get(self.urls[0])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_renamed_group_slug_is_not_served(self):
+        """Старый slug переименованной группы не отвечает 304."""
+        url = self.urls[1]
+        etag = self.guest_client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.slug = 'renamed-slug'
+            self.group.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        self.group.slug = 'test-slug'
+        self.group.save()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.busy = Group.objects.create(
+            title='Активная', slug='busy', description='Описание'
+        )
+        cls.quiet = Group.objects.create(
+            title='Тихая', slug='quiet', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.busy, text=f'Пост {number}')
+            for number in range(3)
+        )
+        old = Post.objects.create(
+            author=cls.user, group=cls.quiet, text='Старый пост'
+        )
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_groups(self):
+        response = Client().get(reverse('posts:groups'))
+        return {
+            group.slug: group for group in response.context['page_obj']
+        }
+
+    def test_directory_shows_stats(self):
+        """Число постов, активность за неделю и дата последнего поста."""
+        GroupStats.rebuild()
+        groups = self.get_groups()
+        self.assertEqual(list(groups), ['busy', 'quiet'])
+        self.assertEqual(
+            (groups['busy'].posts_count, groups['busy'].recent_posts_count),
+            (3, 3)
+        )
+        self.assertEqual(
+            (groups['quiet'].posts_count, groups['quiet'].recent_posts_count),
+            (1, 0)
+        )
+        self.assertLess(
+            groups['quiet'].last_post_date, groups['busy'].last_post_date
+        )
+
+    def test_page_does_not_scan_posts(self):
+        """Страница не читает таблицу постов, даже без очереди задач."""
+        with CaptureQueriesContext(connection) as captured:
+            self.get_groups()
+        self.assertTrue(captured)
+        for query in captured:
+            self.assertNotIn('posts_post', query['sql'])
+
+    def test_refresh_queued_for_worker(self):
+        """Пересчёт - задача для обработчика раз в интервал, не запрос."""
+        self.assertEqual(self.get_groups()['busy'].posts_count, None)
+        self.assertEqual(
+            list(Task.objects.values_list('name', flat=True)),
+            ['posts.group_stats']
+        )
+        self.get_groups()
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(run_batch(), (1, 0))
+        self.assertEqual(self.get_groups()['busy'].posts_count, 3)
+
+    def test_rebuild_updates_rows_in_place(self):
+        """Повторный пересчёт обновляет строки и добавляет новые группы."""
+        GroupStats.rebuild()
+        Post.objects.create(author=self.user, group=self.quiet, text='Новый')
+        fresh = Group.objects.create(title='Новая', slug='fresh')
+        with CaptureQueriesContext(connection) as captured:
+            GroupStats.rebuild()
+        for query in captured:
+            self.assertNotIn('DELETE', query['sql'])
+        self.assertEqual(
+            dict(GroupStats.objects.values_list('group', 'posts_count')),
+            {self.busy.pk: 3, self.quiet.pk: 2, fresh.pk: 0}
+        )
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка «не больше N запросов» для TestCase.
+
+    В отличие от assertNumQueries не требует точного числа: тест падает,
+    только если представление вышло за бюджет, и печатает все запросы.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                query['sql'] for query in context.captured_queries
+            )
+            self.fail(
+                f'Выполнено {executed} запросов при бюджете {budget}:\n'
+                f'{queries}'
+            )
+
+
+class OnCommitMixin:
+    """captureOnCommitCallbacks из Django 3.2 для TestCase на Django 2.2.
+
+    TestCase не коммитит транзакцию, и колбэки transaction.on_commit
+    в нём не выполняются; execute=True выполняет их на выходе из блока,
+    включая поставленные самими колбэками.
+    """
+
+    @contextmanager
+    def captureOnCommitCallbacks(self, using=DEFAULT_DB_ALIAS,
+                                 execute=False):
+        callbacks = []
+        connection = connections[using]
+        start = len(connection.run_on_commit)
+        try:
+            yield callbacks
+        finally:
+            while True:
+                added = [
+                    func for _, func in connection.run_on_commit[start:]
+                ][len(callbacks):]
+                if not added:
+                    break
+                callbacks.extend(added)
+                if not execute:
+                    break
+                for callback in added:
+                    callback()
@@ -0,0 +1,57 @@
+"""Миниатюры картинок постов для лент.
+
+Размеры FEED_THUMBNAILS генерирует фоновая задача posts.thumbnails
+после сохранения поста с новой картинкой; их URL и размеры ложатся в
+поле Post.thumbnails вместе с именем картинки. Шаблоны читают только
+это поле из уже выбранной строки: пока миниатюр нет или они от прежней
+картинки, выводится заглушка, и рендеринг ленты никогда не открывает
+картинку. Запись в базе видят все процессы, а не только обработчик
+очереди, и её не вытесняет кэш.
+"""
+import json
+
+from django.templatetags.static import static
+from sorl.thumbnail import get_thumbnail
+
+from .cons import FEED_THUMBNAILS, PLACEHOLDER_IMAGE
+
+
+def ready_thumbnails(post):
+    """{размер: {'url', 'width', 'height'}} или None, если их ещё нет."""
+    if not post.image or not post.thumbnails:
+        return None
+    try:
+        stored = json.loads(post.thumbnails)
+        if stored['image'] == post.image.name:
+            return stored['sizes']
+    except (ValueError, TypeError, KeyError):
+        pass
+    # Миниатюры прежней картинки или битое значение - как их нет.
+    return None
+
+
+def placeholders():
+    url = static(PLACEHOLDER_IMAGE)
+    thumbnails = {}
+    for size, (geometry, options) in FEED_THUMBNAILS.items():
+        width, height = geometry.split('x')
+        thumbnails[size] = {
+            'url': url, 'width': int(width), 'height': int(height),
+        }
+    return thumbnails
+
+
+def generate_thumbnails(image):
+    """Создаёт миниатюры всех размеров - здесь картинка и декодируется.
+
+    Возвращает значение для Post.thumbnails.
+    """
+    thumbnails = {}
+    for size, (geometry, options) in FEED_THUMBNAILS.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        thumbnails[size] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+    return json.dumps({'image': image.name, 'sizes': thumbnails})
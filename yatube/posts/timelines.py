@@ -0,0 +1,106 @@
+"""Материализованные ленты групп и авторов (fan-out on write).
+
+В кэше по каждой ленте лежит список (pub_date, id) её самых свежих
+TIMELINE_SIZE постов и признак того, что в списке вся лента. Сигналы
+posts.signals дописывают в него новые посты и вычёркивают удалённые,
+поэтому чтение страницы - это срез списка и одна выборка постов по id.
+Пустой кэш заполняется запросом при первом чтении. Запись без
+блокировок: при гонке двух авторов один id может потеряться до
+истечения TIMELINE_TIMEOUT, лента при этом остаётся упорядоченной.
+"""
+from bisect import insort
+
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from .cons import TIMELINE_SIZE, TIMELINE_TIMEOUT
+
+FEED_ORDERING = ('-pub_date', '-id')
+
+
+def timeline_key(feed):
+    return f'posts:timeline:{feed}'
+
+
+def entry(post):
+    # Отрицательные значения: insort держит список по убыванию даты.
+    return (-post.pub_date.timestamp(), -post.pk)
+
+
+def load(feed, queryset):
+    """Возвращает (полна ли лента, записи), заполняя пустой кэш."""
+    stored = cache.get(timeline_key(feed))
+    if stored is None:
+        rows = queryset.order_by(*FEED_ORDERING).values_list(
+            'pub_date', 'id'
+        )[:TIMELINE_SIZE]
+        entries = [(-pub_date.timestamp(), -pk) for pub_date, pk in rows]
+        # Лента короче лимита - значит, в ней все посты.
+        stored = (len(entries) < TIMELINE_SIZE, entries)
+        cache.set(timeline_key(feed), stored, TIMELINE_TIMEOUT)
+    return stored
+
+
+def push(feed, post):
+    key = timeline_key(feed)
+    stored = cache.get(key)
+    if stored is None:
+        return
+    complete, entries = stored
+    item = entry(post)
+    if item in entries:
+        return
+    if not complete and entries and item > entries[-1]:
+        # Пост старше хранимого окна: между окном и ним в базе есть
+        # посты, которых нет в списке. Вставка дала бы дыру в ленте.
+        cache.delete(key)
+        return
+    insort(entries, item)
+    if len(entries) > TIMELINE_SIZE:
+        complete, entries = False, entries[:TIMELINE_SIZE]
+    cache.set(key, (complete, entries), TIMELINE_TIMEOUT)
+
+
+def remove(feed, post_id):
+    key = timeline_key(feed)
+    stored = cache.get(key)
+    if stored is None:
+        return
+    complete, entries = stored
+    kept = [item for item in entries if item[1] != -post_id]
+    if len(kept) != len(entries):
+        cache.set(key, (complete, kept), TIMELINE_TIMEOUT)
+
+
+class TimelineFeed:
+    """Последовательность для Paginator поверх материализованной ленты.
+
+    Страницы внутри ленты собираются по id из кэша, более глубокие -
+    обычным запросом с OFFSET.
+    """
+
+    def __init__(self, feed, queryset):
+        self.feed = feed
+        self.queryset = queryset
+
+    @cached_property
+    def timeline(self):
+        complete, entries = load(self.feed, self.queryset)
+        return complete, [-pk for _, pk in entries]
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        complete, ids = self.timeline
+        stop = key.stop if key.stop is not None else float('inf')
+        if stop > len(ids) and not complete:
+            return list(self.queryset.order_by(*FEED_ORDERING)[key])
+        page_ids = ids[key]
+        posts = self.queryset.in_bulk(page_ids)
+        return [posts[pk] for pk in page_ids if pk in posts]
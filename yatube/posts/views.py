@@ -1,61 +1,181 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .caching import cache_anonymous_page, conditional_page
+from .cons import GROUP_ACTIVITY_DAYS, NUMBER_OF_POSTS
+from .directory import group_directory, schedule_refresh
+from .exporting import (CONTENT_TYPES, FORMATS, encode, export_lines,
+                        parse_since)
+from .feeds import (INDEX_FEED, author_feed, estimate_table_count, feed_state,
+                    group_feed, lookup_id)
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import AuthorStats, Group, Post, User
+from .paginators import (CURSOR_PARAM, CachedCountPaginator, CursorPaginator,
+                         elided_page_range)
+from .search import search_posts
+from .streaming import gzip_stream, render_feed
+from .timelines import TimelineFeed
 
 
-NUMBER_OF_POSTS = 10
-
-
-def get_page_context(queryset, request):
-    paginator = Paginator(queryset, NUMBER_OF_POSTS)
+def get_page_context(queryset, request, feed=None, estimate=None,
+                     timeline=False):
+    if feed is None:
+        paginator = Paginator(queryset, NUMBER_OF_POSTS)
+    elif settings.POSTS_CURSOR_PAGINATION or CURSOR_PARAM in request.GET:
+        return get_cursor_page_context(queryset, request)
+    else:
+        if timeline and settings.POSTS_TIMELINES:
+            queryset = TimelineFeed(feed, queryset)
+        paginator = CachedCountPaginator(
+            queryset, NUMBER_OF_POSTS, feed, estimate=estimate
+        )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
         'paginator': paginator,
         'page_number': page_number,
         'page_obj': page_obj,
+        'page_range': list(
+            elided_page_range(page_obj.number, paginator.num_pages)
+        ),
+    }
+
+
+def get_cursor_page_context(queryset, request):
+    paginator = CursorPaginator(queryset, NUMBER_OF_POSTS)
+    cursor = request.GET.get(CURSOR_PARAM)
+    page_obj = paginator.get_page(cursor)
+    return {
+        'paginator': paginator,
+        'cursor': cursor,
+        'page_obj': page_obj,
+        'cursor_pagination': True,
     }
 
 
+def index_state():
+    return feed_state(INDEX_FEED)
+
+
+def group_state(slug):
+    group_id = lookup_id(Group, 'slug', slug)
+    if group_id is None:
+        return None
+    return feed_state(group_feed(group_id))
+
+
+def profile_state(username):
+    author_id = lookup_id(User, 'username', username)
+    if author_id is None:
+        return None
+    return feed_state(author_feed(author_id))
+
+
+def post_state(post_id):
+    """Страница поста выводит имя автора, число его постов и название
+    группы - их изменения отмечены во времени лент автора и группы."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author__post_stats__posts_count', 'author_id', 'group_id'
+    ).first()
+    if row is None:
+        return None
+    updated, posts_count, author_id, group_id = row
+    feeds = [author_feed(author_id)]
+    if group_id is not None:
+        feeds.append(group_feed(group_id))
+    modified = max([updated] + [feed_state(feed)[0] for feed in feeds])
+    return modified, posts_count
+
+
+@gzip_stream
+@conditional_page(index_state)
+@cache_anonymous_page
 def index(request):
-    posts = Post.objects.all()
-    context = get_page_context(posts, request)
+    posts = Post.objects.select_related('author', 'group')
+    context = get_page_context(
+        posts, request, INDEX_FEED, lambda: estimate_table_count(Post)
+    )
     template = 'posts/index.html'
-    return render(request, template, context)
+    return render_feed(request, template, context)
 
 
+@gzip_stream
+@conditional_page(group_state)
+@cache_anonymous_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.groups.all()
+    posts = group.groups.select_related('author')
     title = f'Записи сообщества {group.title}'
     context = {
         'title': title,
         'group': group,
         'posts': posts,
     }
-    context.update(get_page_context(posts, request))
+    context.update(get_page_context(
+        posts, request, group_feed(group.pk), timeline=True
+    ))
     template = 'posts/group_list.html'
+    return render_feed(request, template, context)
+
+
+def groups(request):
+    schedule_refresh()
+    context = {
+        'activity_days': GROUP_ACTIVITY_DAYS,
+    }
+    context.update(get_page_context(group_directory(), request))
+    template = 'posts/groups.html'
     return render(request, template, context)
 
 
+@gzip_stream
+@conditional_page(profile_state)
+@cache_anonymous_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username
+    )
+    posts = author.posts.select_related('group')
+    posts_count = AuthorStats.for_author(author).posts_count
     context = {
         'author': author,
+        'posts_count': posts_count,
     }
-    context.update(get_page_context(posts, request))
+    context.update(get_page_context(
+        posts, request, author_feed(author.pk), lambda: posts_count,
+        timeline=True,
+    ))
     template = 'posts/profile.html'
+    return render_feed(request, template, context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.none()
+    if query:
+        posts = search_posts(
+            Post.objects.select_related('author', 'group'), query
+        )
+    context = {
+        'query': query,
+    }
+    context.update(get_page_context(posts, request))
+    template = 'posts/search.html'
     return render(request, template, context)
 
 
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    posts = Post.objects.get(id=post_id)
+    posts = get_object_or_404(
+        Post.objects.select_related('author__post_stats', 'group'),
+        id=post_id
+    )
     title = posts.text[:30]
-    posts_number = Post.objects.filter(author=posts.author).count()
+    posts_number = AuthorStats.for_author(posts.author).posts_count
     context = {
         'post_num': posts_number,
         'post': posts,
@@ -68,7 +188,7 @@ def post_detail(request, post_id):
 @login_required
 def post_create(request):
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
         if form.is_valid():
             new_form = form.save(commit=False)
             new_form.author = request.user
@@ -90,12 +210,16 @@ def post_edit(request, post_id):
 
     if request.user == post.author:
         if request.method == 'POST':
-            form = PostForm(request.POST or None, instance=post)
+            form = PostForm(
+                request.POST or None,
+                files=request.FILES or None,
+                instance=post,
+            )
             context = {
                 'form': form,
                 'is_edit': True,
             }
-            if form.is_valid:
+            if form.is_valid():
                 form.save()
                 return redirect('posts:post_detail',
                                 post_id=post.id)
@@ -108,3 +232,27 @@ def post_edit(request, post_id):
         return render(request, template, context)
     return redirect('posts:post_detail',
                     post_id=post.id)
+
+
+@staff_member_required
+def export_posts(request):
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in FORMATS:
+        return HttpResponseBadRequest(f'format: {", ".join(FORMATS)}')
+    since = request.GET.get('since')
+    try:
+        since = parse_since(since) if since else None
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    compress = request.GET.get('gzip') == '1'
+    filename = f'posts.{file_format}'
+    if compress:
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        encode(export_lines(file_format, since), compress),
+        content_type=(
+            'application/gzip' if compress else CONTENT_TYPES[file_format]
+        ),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``
+and can be served by any ASGI 3.0 server, e.g.
+``uvicorn yatube.asgi:application``.
+
+Django 2.2 has no native ASGI handler, so requests are passed to the
+regular WSGI handler in a pool of settings.ASGI_THREADS threads
+(see core.asgi).
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ASGIBridge
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ASGIBridge(get_wsgi_application(), settings.ASGI_THREADS)
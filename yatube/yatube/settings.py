@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -51,15 +52,20 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +75,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Сессии и пользователь запроса - из памяти процесса и общего кэша
+# (core.sessions, core.auth), база - только при промахе. Новые входы
+# идут через CachedModelBackend; ModelBackend остаётся в списке, чтобы
+# сессии, созданные до его подключения, не разлогинились.
+SESSION_ENGINE = 'core.sessions'
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
@@ -90,6 +106,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Размер пула потоков, в котором yatube.asgi выполняет представления:
+# столько запросов одновременно работают с БД, остальные соединения
+# ждут в цикле событий, не занимая потоков
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -101,6 +122,49 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: пути к файлам SQLite через запятую.
+# Локально их наполняет manage.py sync_replicas.
+_replica_files = os.environ.get('YATUBE_DB_REPLICAS', '')
+for _number, _name in enumerate(filter(None, _replica_files.split(',')), 1):
+    DATABASES[f'replica{_number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _name,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Представления, которые только читают: их запросы идут в реплики
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+)
+# round_robin или least_loaded (меньше всего запросов в работе)
+REPLICA_SELECTION = 'round_robin'
+# Сколько секунд после записи клиент читает только с default
+REPLICA_PIN_SECONDS = 15
+
+# Профиль SQLite для продакшена (YATUBE_SQLITE_PRODUCTION=1): WAL -
+# читатели не ждут писателя, соединения живут между запросами.
+# PRAGMA применяет core.signals.tune_sqlite к каждому соединению.
+SQLITE_PRODUCTION = os.environ.get('YATUBE_SQLITE_PRODUCTION') == '1'
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - в КиБ: 64 МиБ страничного кэша.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS if SQLITE_PRODUCTION else {}
+if SQLITE_PRODUCTION:
+    for _database in DATABASES.values():
+        _database['CONN_MAX_AGE'] = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,3 +205,77 @@ USE_TZ = True
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 STATIC_URL = '/static/'
+
+# Сборка: manage.py collectstatic кладёт сюда файлы с хешем в имени,
+# манифест и сжатые копии .gz/.br (core.storage)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# Раздавать STATIC_ROOT из приложения (core.middleware.
+# StaticFilesMiddleware), если перед ним нет nginx/CDN
+CORE_SERVE_STATIC = os.environ.get('YATUBE_SERVE_STATIC') == '1'
+# Cache-Control для файлов без хеша в имени, секунд
+CORE_STATIC_MAX_AGE = 60
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Ключи sorl-thumbnail (размеры картинок и миниатюр) - в кэше, без
+# таблицы thumbnail_kvstore
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+
+# Лента постов: True - keyset-пагинация по ?cursor= вместо ?page=
+# (без COUNT(*) и OFFSET, страницы без номеров)
+POSTS_CURSOR_PAGINATION = False
+
+# Ленты index, group_list и profile: True - потоковый ответ (posts.
+# streaming), шапка страницы уходит до выборки постов. GZIP - сжимать
+# такой ответ на лету, если перед приложением этого никто не делает
+POSTS_STREAMING_FEEDS = os.environ.get('YATUBE_STREAMING_FEEDS') == '1'
+POSTS_STREAMING_GZIP = os.environ.get('YATUBE_STREAMING_GZIP') == '1'
+
+# Кэш: размеры лент, страницы и фрагменты шаблонов.
+# В продакшене - общий для всех процессов бэкенд (Redis/Memcached).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Материализованные ленты групп и авторов в кэше (posts.timelines):
+# чтение страницы - срез списка id и одна выборка по ним
+POSTS_TIMELINES = False
+
+# Как часто (в секундах) процесс выкладывает гистограммы core.metrics
+# для /metrics/ и manage.py perf_metrics
+CORE_METRICS_PUBLISH_INTERVAL = 10
+# Каталог снимков core.metrics: по файлу на процесс. Процессы на разных
+# машинах должны видеть один каталог (общий том)
+CORE_METRICS_DIR = os.environ.get(
+    'YATUBE_METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube-metrics'),
+)
+
+# Память процесса перед общим кэшем (core.cache): сколько записей и
+# сколько секунд другой процесс может видеть устаревшие данные
+CORE_LOCAL_CACHE_SIZE = 10000
+CORE_LOCAL_CACHE_TIMEOUT = 5
+# Сколько пользователь запроса живёт в общем кэше, секунд
+CORE_USER_CACHE_TIMEOUT = 15 * 60
+
+# Очередь задач core.tasks: False - задача выполняется сразу при
+# постановке, True - ложится в таблицу core_task, и её выполняет
+# manage.py run_tasks
+CORE_TASKS_ASYNC = os.environ.get('YATUBE_TASKS_ASYNC') == '1'
+CORE_TASKS_BATCH_SIZE = 100
+CORE_TASKS_MAX_ATTEMPTS = 5
+# Пауза перед повтором, секунд; удваивается с каждой попыткой
+CORE_TASKS_RETRY_DELAY = 10
+# На сколько секунд взятая пачка скрыта от других обработчиков
+CORE_TASKS_LEASE = 300
+
+# Время рендеринга каждого шаблона и {% include %} в заголовке
+# Server-Timing ответа и в метрике шаблонов (core.profiling). Подменяет
+# Template._render во всём процессе, поэтому только явно: в production
+# заголовок раскрывает имена шаблонов.
+CORE_TEMPLATE_PROFILING = os.environ.get('YATUBE_TEMPLATE_PROFILING') == '1'